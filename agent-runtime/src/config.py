@@ -49,6 +49,8 @@ class Settings(BaseSettings):
   )
 
   GRPC_PORT: int = 50051
+  # 单个 HTTP/2 连接上允许的最大并发流数
+  GRPC_MAX_CONCURRENT_STREAMS: int = 100
 
   DEEPSEEK_API_KEY: str = ""
   DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
@@ -56,6 +58,12 @@ class Settings(BaseSettings):
 
   MAX_LOOPS: int = 15
 
+  # 单个 runtime 最多缓存的 session Agent 数量，超出时淘汰最久未使用的
+  MAX_AGENTS: int = 256
+  # session 空闲多久（秒）后回收其 Agent；<= 0 表示不回收（默认）。
+  # 回收后 Agent 的历史会丢失，RunStep 会要求客户端重新 Configure
+  AGENT_IDLE_TIMEOUT: float = 0.0
+
   WORKSPACE_DIR: str = "/app/workspace"
 
   # Platform callback URL (used by create_service / export_files tools)
@@ -1,15 +1,15 @@
 import asyncio
 import json
 import logging
-import os
 from typing import AsyncGenerator, Any, Dict, List, Optional
 
 from src.core.base import BaseAgent, AgentMetadata, AgentCapability
+from src.core.context import SESSION_ID_VAR
 from src.core.llm import LLMClient
 from src.core.memory import Memory
 from src.config import settings
 from src.pb import agent_pb2
-from src.tools import TOOL_REGISTRY, get_tool_schemas, get_tool_executor
+from src.tools import FROZEN_TOOL_NAMES, batch_tool_calls, get_tool_schemas, get_tool_executor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -168,9 +168,8 @@ class DefaultAgent(BaseAgent):
     self._system_prompt = system_prompt
     self._cancelled.clear()
 
-    # 将 Session 写入环境变量，供 Go 后端使用
-    # TODO：有没有别的更优雅的实现？
-    os.environ["SESSION_ID"] = session_id
+    # 将 Session 写入当前上下文，供调用 Go 后端的工具使用
+    SESSION_ID_VAR.set(session_id)
 
     if agent_config:
       if "max_loops" in agent_config:
@@ -183,7 +182,7 @@ class DefaultAgent(BaseAgent):
       schemas = get_tool_schemas(builtin_tools)
       self.tools.extend(schemas)
       self._active_tool_names.extend(
-        [n for n in builtin_tools if n in TOOL_REGISTRY]
+        [n for n in builtin_tools if n in FROZEN_TOOL_NAMES]
       )
 
     if extra_tools:
@@ -257,38 +256,42 @@ class DefaultAgent(BaseAgent):
               "source": "llm",
             }
 
-          for tool_call in tool_calls:
-            yield {
-              "type": agent_pb2.EventType.EVENT_TYPE_TOOL_CALL,
-              "content": f"Calling {tool_call.function.name} with {tool_call.function.arguments}",
-              "source": "agent",
-              "metadata_json": json.dumps({
-                "tool_call_id": tool_call.id,
-                "name": tool_call.function.name,
-                "arguments": tool_call.function.arguments,
-              }),
-            }
-
-            result = await self._execute_tool(
-              tool_call.function.name,
-              tool_call.function.arguments,
-            )
-
-            yield {
-              "type": agent_pb2.EventType.EVENT_TYPE_TOOL_RESULT,
-              "content": result,
-              "source": "tool",
-              "metadata_json": json.dumps({
-                "tool_call_id": tool_call.id,
-                "name": tool_call.function.name,
-              }),
-            }
-
-            self.memory.add_message(
-              role="tool",
-              content=result,
-              tool_call_id=tool_call.id,
-            )
+          # 同一批内的只读调用并发执行，结果仍按调用顺序返回
+          for batch in batch_tool_calls([tc.function.name for tc in tool_calls]):
+            calls = tool_calls[batch]
+            for tool_call in calls:
+              yield {
+                "type": agent_pb2.EventType.EVENT_TYPE_TOOL_CALL,
+                "content": f"Calling {tool_call.function.name} with {tool_call.function.arguments}",
+                "source": "agent",
+                "metadata_json": json.dumps({
+                  "tool_call_id": tool_call.id,
+                  "name": tool_call.function.name,
+                  "arguments": tool_call.function.arguments,
+                }),
+              }
+
+            results = await asyncio.gather(*(
+              self._execute_tool(tool_call.function.name, tool_call.function.arguments)
+              for tool_call in calls
+            ))
+
+            for tool_call, result in zip(calls, results):
+              yield {
+                "type": agent_pb2.EventType.EVENT_TYPE_TOOL_RESULT,
+                "content": result,
+                "source": "tool",
+                "metadata_json": json.dumps({
+                  "tool_call_id": tool_call.id,
+                  "name": tool_call.function.name,
+                }),
+              }
+
+              self.memory.add_message(
+                role="tool",
+                content=result,
+                tool_call_id=tool_call.id,
+              )
         else:
           self.memory.add_message("assistant", collected_content or "")
           yield {
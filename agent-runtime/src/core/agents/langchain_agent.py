@@ -1,18 +1,21 @@
 import asyncio
 import json
 import logging
-import os
-from typing import AsyncGenerator, Any, Dict, List, Optional
+from typing import AsyncGenerator, Any, Dict, List, Mapping, Optional
 
 from src.core.base import BaseAgent, AgentMetadata, AgentCapability
+from src.core.context import SESSION_ID_VAR
 from src.core.memory import Memory
 from src.config import settings
 from src.pb import agent_pb2
-from src.tools import TOOL_REGISTRY, get_tool_schemas, get_tool_executor
+from src.tools import batch_tool_calls, get_tool_schema, get_tool_executor
 from src.registry import register_agent
 
 logger = logging.getLogger(__name__)
 
+# 超过该大小的工具参数/结果在线程池中序列化和入库，避免阻塞其他 session
+_OFFLOAD_THRESHOLD = 64 * 1024
+
 # 延迟导入 LangChain，如果不可用则记录警告
 _LANGCHAIN_AVAILABLE = False
 try:
@@ -29,7 +32,7 @@ except ImportError:
   )
 
 
-def _make_langchain_tool(name: str, executor, schema: dict) -> Any:
+def _make_langchain_tool(name: str, executor, schema: Mapping[str, Any]) -> Any:
   """将平台内置工具包装为 LangChain StructuredTool。"""
   func_def = schema.get("function", schema)
   description = func_def.get("description", f"Tool: {name}")
@@ -46,6 +49,28 @@ def _make_langchain_tool(name: str, executor, schema: dict) -> Any:
   )
 
 
+# role -> LangChain Message 构造函数（名称在调用时解析，LangChain 缺失时不会被调用）
+_LC_BUILDERS = {
+  "system": lambda m: SystemMessage(content=m.get("content") or ""),
+  "user": lambda m: HumanMessage(content=m.get("content") or ""),
+  "assistant": lambda m: AIMessage(content=m.get("content") or ""),
+  "tool": lambda m: ToolMessage(
+    content=m.get("content") or "", tool_call_id=m.get("tool_call_id", "")
+  ),
+}
+
+
+def _tool_call_key(tc: dict) -> Any:
+  """tool_call 的去重键：优先 id，没有 id 时退化为 (name, args_json)。"""
+  tc_id = tc.get("id")
+  if tc_id:
+    return tc_id
+  if "function" in tc:
+    func = tc.get("function") or {}
+    return (func.get("name", ""), func.get("arguments", ""))
+  return (tc.get("name", ""), json.dumps(tc.get("args", {}), sort_keys=True))
+
+
 @register_agent("langchain")
 class LangchainAgent(BaseAgent):
   """
@@ -100,7 +125,7 @@ class LangchainAgent(BaseAgent):
     self._system_prompt = system_prompt
     self._cancelled.clear()
 
-    os.environ["SESSION_ID"] = session_id
+    SESSION_ID_VAR.set(session_id)
 
     # 解析配置
     temperature = 0.0
@@ -129,12 +154,13 @@ class LangchainAgent(BaseAgent):
 
     if builtin_tools:
       for name in builtin_tools:
-        entry = TOOL_REGISTRY.get(name)
-        if entry:
-          lc_tool = _make_langchain_tool(name, entry["executor"], entry["schema"])
+        executor = get_tool_executor(name)
+        if executor:
+          schema = get_tool_schema(name)
+          lc_tool = _make_langchain_tool(name, executor, schema)
           self._tools[name] = lc_tool
           self._active_tool_names.append(name)
-          self._tool_schemas.append(entry["schema"])
+          self._tool_schemas.append(schema)
 
     # LangChain 不直接使用 extra_tools 的 OpenAI 格式，但我们保留兼容
     if extra_tools:
@@ -181,6 +207,7 @@ class LangchainAgent(BaseAgent):
 
         collected_content = []
         tool_calls = []
+        seen_tc_keys: set = set()
 
         async for chunk in llm.astream(messages):
           if self._cancelled.is_set():
@@ -194,14 +221,22 @@ class LangchainAgent(BaseAgent):
               "source": "llm",
             }
 
+          # 优先使用解析后的 chunk.tool_calls；additional_kwargs 中的原始格式
+          # 往往是同一批调用，只补充尚未见过的
           if hasattr(chunk, "tool_calls") and chunk.tool_calls:
-            tool_calls.extend(chunk.tool_calls)
+            for tc in chunk.tool_calls:
+              key = _tool_call_key(tc)
+              if key not in seen_tc_keys:
+                seen_tc_keys.add(key)
+                tool_calls.append(tc)
 
           # 中途 chunk 可能携带 additional_kwargs 中的增量 tool_calls
           if hasattr(chunk, "additional_kwargs"):
-            tc = chunk.additional_kwargs.get("tool_calls", [])
-            if tc:
-              tool_calls.extend(tc)
+            for tc in chunk.additional_kwargs.get("tool_calls", []):
+              key = _tool_call_key(tc)
+              if key not in seen_tc_keys:
+                seen_tc_keys.add(key)
+                tool_calls.append(tc)
 
         full_content = "".join(collected_content)
 
@@ -217,37 +252,50 @@ class LangchainAgent(BaseAgent):
               "source": "llm",
             }
 
-          for tc in tool_calls:
-            tc_name = tc.get("name", tc.get("function", {}).get("name", "unknown"))
-            tc_args = tc.get("args", {})
-            tc_id = tc.get("id", "")
-
-            yield {
-              "type": agent_pb2.EventType.EVENT_TYPE_TOOL_CALL,
-              "content": f"Calling {tc_name} with {json.dumps(tc_args)}",
-              "source": "agent",
-              "metadata_json": json.dumps({
-                "tool_call_id": tc_id,
-                "name": tc_name,
-                "arguments": json.dumps(tc_args),
-              }),
-            }
+          calls = [
+            (tc.get("name", tc.get("function", {}).get("name", "unknown")),
+             tc.get("args", {}),
+             tc.get("id", ""))
+            for tc in tool_calls
+          ]
+          # 同一批内的只读调用并发执行，结果仍按调用顺序返回
+          for batch in batch_tool_calls([name for name, _, _ in calls]):
+            for tc_name, tc_args, tc_id in calls[batch]:
+              args_json = json.dumps(tc_args)
+              tc_meta = {"tool_call_id": tc_id, "name": tc_name, "arguments": args_json}
+              if len(args_json) > _OFFLOAD_THRESHOLD:
+                # 大参数（如 file_write 的内容）二次编码放到线程池，避免阻塞事件循环
+                meta_json = await asyncio.to_thread(json.dumps, tc_meta)
+              else:
+                meta_json = json.dumps(tc_meta)
+
+              yield {
+                "type": agent_pb2.EventType.EVENT_TYPE_TOOL_CALL,
+                "content": f"Calling {tc_name} with {args_json}",
+                "source": "agent",
+                "metadata_json": meta_json,
+              }
 
             # 执行工具
-            result = await self._execute_tool(tc_name, tc_args)
-
-            yield {
-              "type": agent_pb2.EventType.EVENT_TYPE_TOOL_RESULT,
-              "content": result,
-              "source": "tool",
-              "metadata_json": json.dumps({
-                "tool_call_id": tc_id,
-                "name": tc_name,
-              }),
-            }
-
-            messages.append(ToolMessage(content=result, tool_call_id=tc_id))
-            self._memory.add_message("tool", result, tool_call_id=tc_id)
+            results = await asyncio.gather(*(
+              self._execute_tool(tc_name, tc_args) for tc_name, tc_args, _ in calls[batch]
+            ))
+
+            for (tc_name, _, tc_id), result in zip(calls[batch], results):
+              yield {
+                "type": agent_pb2.EventType.EVENT_TYPE_TOOL_RESULT,
+                "content": result,
+                "source": "tool",
+                "metadata_json": json.dumps({
+                  "tool_call_id": tc_id,
+                  "name": tc_name,
+                }),
+              }
+
+              if len(result) > _OFFLOAD_THRESHOLD:
+                await asyncio.to_thread(self._record_tool_result, messages, tc_id, result)
+              else:
+                self._record_tool_result(messages, tc_id, result)
         else:
           # 无工具调用 → 最终回答
           self._memory.add_message("assistant", full_content or "")
@@ -288,22 +336,19 @@ class LangchainAgent(BaseAgent):
     self._tools.clear()
     self._llm = None
 
+  def _record_tool_result(self, messages: list, tc_id: str, result: str) -> None:
+    """把工具结果同时写入 LangChain 消息列表和 Memory。"""
+    messages.append(ToolMessage(content=result, tool_call_id=tc_id))
+    self._memory.add_message("tool", result, tool_call_id=tc_id)
+
   def _build_lc_messages(self) -> list:
     """将 Memory 历史转为 LangChain Message 对象列表。"""
-    lc_msgs = []
-    for msg in self._memory.get_history():
-      role = msg["role"]
-      content = msg.get("content") or ""
-      if role == "system":
-        lc_msgs.append(SystemMessage(content=content))
-      elif role == "user":
-        lc_msgs.append(HumanMessage(content=content))
-      elif role == "assistant":
-        lc_msgs.append(AIMessage(content=content))
-      elif role == "tool":
-        tc_id = msg.get("tool_call_id", "")
-        lc_msgs.append(ToolMessage(content=content, tool_call_id=tc_id))
-    return lc_msgs
+    builders = _LC_BUILDERS
+    return [
+      builders[msg["role"]](msg)
+      for msg in self._memory.get_history()
+      if msg["role"] in builders
+    ]
 
   async def _execute_tool(self, name: str, args: dict) -> str:
     """执行工具调用。优先使用 LangChain 封装的工具，回退到平台工具。"""
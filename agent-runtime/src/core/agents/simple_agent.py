@@ -63,10 +63,8 @@ class SimpleAgent(BaseAgent):
     self.memory.add_message("user", input_text)
 
     # 截断历史（保留 system + 最新的 N 条）
+    self.memory.truncate(self._max_history)
     history = self.memory.get_history()
-    if len(history) > self._max_history + 1:
-      self.memory.history = [history[0]] + history[-(self._max_history):]
-      history = self.memory.get_history()
 
     try:
       collected = []
@@ -0,0 +1,15 @@
+"""
+请求级上下文变量。
+
+gRPC aio 中每个 RPC 运行在独立的 asyncio task 里，ContextVar 让并发的
+session 各自看到自己的值，而不是像 os.environ 那样进程内共享、互相覆盖。
+"""
+
+from contextvars import ContextVar
+
+# 当前 RPC 所属的 session，供需要回调 Platform API 的工具读取
+SESSION_ID_VAR: ContextVar[str] = ContextVar("session_id", default="")
+
+
+def current_session_id() -> str:
+  return SESSION_ID_VAR.get()
@@ -63,6 +63,7 @@ class LLMClient:
     )
 
     content_parts: list[str] = []
+    # 参数 JSON 以片段形式到达，先收集到列表，结束时一次性 join，避免字符串反复 +=
     tool_calls_map: dict[int, dict] = {}
 
     async for chunk in stream:
@@ -81,15 +82,17 @@ class LLMClient:
       if delta and delta.tool_calls:
         for tc_delta in delta.tool_calls:
           idx = tc_delta.index
-          if idx not in tool_calls_map:
-            tool_calls_map[idx] = {"id": "", "name": "", "arguments": ""}
+          entry = tool_calls_map.get(idx)
+          if entry is None:
+            entry = tool_calls_map[idx] = {"id": "", "name_parts": [], "args_parts": []}
           if tc_delta.id:
-            tool_calls_map[idx]["id"] = tc_delta.id
-          if tc_delta.function:
-            if tc_delta.function.name:
-              tool_calls_map[idx]["name"] += tc_delta.function.name
-            if tc_delta.function.arguments:
-              tool_calls_map[idx]["arguments"] += tc_delta.function.arguments
+            entry["id"] = tc_delta.id
+          fn = tc_delta.function
+          if fn:
+            if fn.name:
+              entry["name_parts"].append(fn.name)
+            if fn.arguments:
+              entry["args_parts"].append(fn.arguments)
 
       # Finished
       if choice.finish_reason is not None:
@@ -100,10 +103,11 @@ class LLMClient:
             ToolCall(
               id=tc["id"],
               function=ToolCallFunction(
-                name=tc["name"],
-                arguments=tc["arguments"],
+                name="".join(tc["name_parts"]),
+                arguments="".join(tc["args_parts"]),
               ),
             )
-            for _, tc in sorted(tool_calls_map.items())
+            # provider 按 index 递增顺序下发，dict 的插入顺序即调用顺序
+            for tc in tool_calls_map.values()
           ]
-        yield {"type": "done", "content": content, "tool_calls": tool_calls}
\ No newline at end of file
+        yield {"type": "done", "content": content, "tool_calls": tool_calls}
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Set
 import logging
 
 logger = logging.getLogger(__name__)
@@ -6,6 +6,8 @@ logger = logging.getLogger(__name__)
 class Memory:
   def __init__(self):
     self.history: List[Dict[str, Any]] = []
+    # 尚未收到 tool 响应的 tool_call_id，repair_history 的快速路径依赖它
+    self._pending_tool_ids: Set[str] = set()
 
   def add_message(self, role: str, content: Optional[str], tool_calls: list = None, tool_call_id: str = None):
     message = {"role": role, "content": content}
@@ -15,15 +17,29 @@ class Memory:
         tc.model_dump() if hasattr(tc, "model_dump") else tc
         for tc in tool_calls
       ]
+      for tc in message["tool_calls"]:
+        tc_id = tc.get("id", "") if isinstance(tc, dict) else ""
+        if tc_id:
+          self._pending_tool_ids.add(tc_id)
     if tool_call_id:
       message["tool_call_id"] = tool_call_id
+      if role == "tool":
+        self._pending_tool_ids.discard(tool_call_id)
     self.history.append(message)
 
-  def get_history(self) -> List[Dict[str, Any]]:
+  def get_history(self) -> Sequence[Dict[str, Any]]:
+    # 返回的是内部列表本身（避免每轮复制），调用方只应读取，修改请走 Memory 的方法
     return self.history
 
+  def truncate(self, max_len: int):
+    # 原地截断：保留第一条（system）消息和最新的 max_len 条
+    excess = len(self.history) - 1 - max_len
+    if excess > 0:
+      del self.history[1:1 + excess]
+
   def clear(self):
     self.history = []
+    self._pending_tool_ids.clear()
 
   def repair_history(self):
     # 在工具调用中断时修复对话历史。
@@ -33,6 +49,10 @@ class Memory:
     # "An assistant message with 'tool_calls' must be followed by tool
     #  messages responding to each 'tool_call_id'."
 
+    # 正常轮次中所有 tool_call 都已得到响应，直接返回，无需扫描。
+    if not self._pending_tool_ids:
+      return
+
     # 扫描历史记录，并为每个缺少工具响应的 tool_call 插入合成的错误结果消息。
     repaired: List[Dict[str, Any]] = []
     i = 0
@@ -67,6 +87,7 @@ class Memory:
             })
             patched = True
 
+    self._pending_tool_ids.clear()
     if patched:
       self.history = repaired
       logger.warning("Repaired conversation history — added missing tool result messages")
\ No newline at end of file
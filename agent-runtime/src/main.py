@@ -5,6 +5,7 @@ from concurrent import futures
 from src.config import settings
 from src.service import AgentService
 from src.pb import agent_pb2_grpc
+from src.tools import aclose_tools
 
 logging.basicConfig(
   level=logging.INFO,
@@ -22,16 +23,23 @@ async def serve():
       ('grpc.keepalive_permit_without_calls', True),
       ('grpc.http2.min_recv_ping_interval_without_data_ms', 5000),
       ('grpc.http2.max_pings_without_data', 0),
+      # 限制单连接上并发的流数，配合流控为每个 session 的内存占用设上限
+      ('grpc.max_concurrent_streams', settings.GRPC_MAX_CONCURRENT_STREAMS),
     ],
   )
-  agent_pb2_grpc.add_AgentServiceServicer_to_server(AgentService(), server)
+  service = AgentService()
+  agent_pb2_grpc.add_AgentServiceServicer_to_server(service, server)
   port = settings.GRPC_PORT
   server.add_insecure_port(f'[::]:{port}')
   logger.info(f"Starting Agent Runtime gRPC server on port {port}...")
   await server.start()
   
   # 等待终止
-  await server.wait_for_termination()
+  try:
+    await server.wait_for_termination()
+  finally:
+    await service.aclose()
+    await aclose_tools()
 
 if __name__ == '__main__':
   try:
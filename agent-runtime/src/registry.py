@@ -21,9 +21,12 @@ AGENT_TYPE=langchain python -m src.main
 
 from __future__ import annotations
 
+import functools
 import importlib
 import logging
-from typing import Callable, Dict, List, Optional, Type
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Type
 
 from src.core.base import BaseAgent, AgentMetadata
 
@@ -33,6 +36,15 @@ logger = logging.getLogger(__name__)
 _AGENT_REGISTRY: Dict[str, Callable[[], BaseAgent]] = {}
 _BUILTIN_LOADED: bool = False
 
+# (module_path, class_name) -> Agent 类，避免重复走 import 机制
+_MODULE_CLASS_CACHE: Dict[Tuple[str, str], Type[BaseAgent]] = {}
+_MODULE_CLASS_LOCK = threading.RLock()
+
+
+def _registry_key(name: str) -> str:
+  """注册表键统一小写并驻留，查找不区分大小写。"""
+  return sys.intern(name.lower())
+
 
 def register_agent(name: str):
   """
@@ -43,26 +55,30 @@ def register_agent(name: str):
       raise TypeError(
         f"register_agent: {cls.__name__} must be a subclass of BaseAgent"
       )
-    _AGENT_REGISTRY[name] = cls
+    _AGENT_REGISTRY[_registry_key(name)] = cls
     logger.info("Registered agent type: %s -> %s", name, cls.__name__)
     return cls
   return decorator
 
 
+@functools.cache
+def _load_builtins() -> None:
+  # 只有成功时结果才会被缓存；导入失败会抛出异常，下次调用时重试
+  global _BUILTIN_LOADED
+  import src.core.agents  # noqa: F401 — 触发注册
+  _BUILTIN_LOADED = True
+  logger.info("Built-in agents loaded: %s", list(_AGENT_REGISTRY.keys()))
+
+
 def ensure_builtin_agents() -> None:
   """
   确保内置 Agent 已注册。
 
   通过导入 src.core.agents 包来触发所有 @register_agent 装饰器。
-  幂等，多次调用无副作用。
+  幂等，多次调用无副作用。热路径上的调用方应先检查 _BUILTIN_LOADED。
   """
-  global _BUILTIN_LOADED
-  if _BUILTIN_LOADED:
-    return
   try:
-    import src.core.agents  # noqa: F401 — 触发注册
-    _BUILTIN_LOADED = True
-    logger.info("Built-in agents loaded: %s", list(_AGENT_REGISTRY.keys()))
+    _load_builtins()
   except Exception as e:
     logger.warning("Failed to load built-in agents: %s", e)
 
@@ -76,21 +92,24 @@ def get_agent_factory(agent_type: Optional[str] = None) -> Callable[[], BaseAgen
   2. 注册表中已注册的类型
   3. 默认 DefaultAgent
   """
-  ensure_builtin_agents()
+  if not _BUILTIN_LOADED:
+    ensure_builtin_agents()
 
   # 默认 fallback
-  if not agent_type or agent_type == "default":
+  key = _registry_key(agent_type) if agent_type else ""
+  if not key or key == "default":
     from src.core.agent import DefaultAgent
     return DefaultAgent
 
   # 从注册表查找
-  if agent_type in _AGENT_REGISTRY:
-    logger.info("Using registered agent type: %s", agent_type)
-    return _AGENT_REGISTRY[agent_type]
+  cls = _AGENT_REGISTRY.get(key)
+  if cls is not None:
+    logger.info("Using registered agent type: %s", key)
+    return cls
 
   raise ValueError(
     f"Unknown agent type: '{agent_type}'. "
-    f"Available types: {list(_AGENT_REGISTRY.keys()) + ['default']}"
+    f"Available types: {(*_AGENT_REGISTRY, 'default')}"
   )
 
 
@@ -101,28 +120,41 @@ def load_agent_from_module(module_path: str, class_name: str) -> Callable[[], Ba
   这适用于需要在运行时加载自定义 Agent 的场景，
   如用户在 Dockerfile 中安装了自己的 Agent 包。
   """
-  logger.info("Loading agent from module: %s.%s", module_path, class_name)
-  module = importlib.import_module(module_path)
-  cls = getattr(module, class_name)
+  key = (module_path, class_name)
+  cls = _MODULE_CLASS_CACHE.get(key)
+  if cls is not None:
+    return cls
 
-  if not issubclass(cls, BaseAgent):
-    raise TypeError(
-      f"{class_name} in {module_path} is not a subclass of BaseAgent"
-    )
+  with _MODULE_CLASS_LOCK:
+    cls = _MODULE_CLASS_CACHE.get(key)
+    if cls is not None:
+      return cls
 
-  # 自动注册
-  _AGENT_REGISTRY[class_name.lower()] = cls
-  return cls
+    logger.info("Loading agent from module: %s.%s", module_path, class_name)
+    module = sys.modules.get(module_path) or importlib.import_module(module_path)
+    cls = getattr(module, class_name)
+
+    if not isinstance(cls, type) or not issubclass(cls, BaseAgent):
+      raise TypeError(
+        f"{class_name} in {module_path} is not a subclass of BaseAgent"
+      )
+
+    # 自动注册
+    _AGENT_REGISTRY[_registry_key(class_name)] = cls
+    _MODULE_CLASS_CACHE[key] = cls
+    return cls
 
 
 def list_registered_agents() -> List[str]:
-  ensure_builtin_agents()
+  if not _BUILTIN_LOADED:
+    ensure_builtin_agents()
   return list(_AGENT_REGISTRY.keys())
 
 
 def get_agent_metadata(agent_type: str) -> Optional[AgentMetadata]:
-  ensure_builtin_agents()
-  factory = _AGENT_REGISTRY.get(agent_type)
+  if not _BUILTIN_LOADED:
+    ensure_builtin_agents()
+  factory = _AGENT_REGISTRY.get(_registry_key(agent_type))
   if factory is None:
     return None
   if hasattr(factory, "metadata"):
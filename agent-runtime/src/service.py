@@ -1,59 +1,202 @@
+import asyncio
+import contextlib
 import grpc
-import json
+import orjson
 import time
 import logging
-from typing import Dict
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
 
+from src.config import settings
 from src.pb import agent_pb2
 from src.pb import agent_pb2_grpc
 from src.core.base import BaseAgent
 from src.core.agent import DefaultAgent
+from src.core.context import SESSION_ID_VAR
 from src.registry import ensure_builtin_agents
 
 logger = logging.getLogger(__name__)
 
+_TICK_INTERVAL = 0.1
+
+_UNSPECIFIED = agent_pb2.EventType.EVENT_TYPE_UNSPECIFIED
+
+# 事件类型查找表：接受枚举值，也接受名称（"EVENT_TYPE_TEXT_CHUNK" 或 "text_chunk"），
+# 每个事件只需一次 dict 查找，未知类型回退为 UNSPECIFIED 而不是让 protobuf 抛异常
+_TYPE_LOOKUP: Dict[Any, int] = {}
+for _name, _value in agent_pb2.EventType.items():
+  _TYPE_LOOKUP[_value] = _value
+  _TYPE_LOOKUP[_name] = _value
+  _TYPE_LOOKUP[_name.removeprefix("EVENT_TYPE_").lower()] = _value
+
+
+def _to_event(event_data: dict, timestamp: int) -> agent_pb2.AgentEvent:
+  """将 Agent 产出的事件字典转换为 AgentEvent。"""
+  get = event_data.get
+  return agent_pb2.AgentEvent(
+    type=_TYPE_LOOKUP.get(get("type", _UNSPECIFIED), _UNSPECIFIED),
+    content=get("content", ""),
+    source=get("source", "agent"),
+    metadata_json=get("metadata_json", ""),
+    timestamp=timestamp,
+  )
+
+
+def _parse_parameters(parameters_json: str) -> Any:
+  if not parameters_json:
+    return {}
+  try:
+    return orjson.loads(parameters_json)
+  except orjson.JSONDecodeError:
+    return {}
+
+
 # 只要实现了 AgentService 的接口方法，就可以通过 gRPC 提供服务
 class AgentService(agent_pb2_grpc.AgentServiceServicer):
   def __init__(self, agent_factory=None):
     ensure_builtin_agents()
     self._agent_factory = agent_factory or (lambda: DefaultAgent())
-    self._agents: Dict[str, BaseAgent] = {}
+    # 按最近使用排序的 session -> Agent；超过上限时淘汰最久未使用的
+    self._agents: "OrderedDict[str, BaseAgent]" = OrderedDict()
+    self._max_agents: int = settings.MAX_AGENTS
+    self._idle_timeout: float = settings.AGENT_IDLE_TIMEOUT
+    self._last_used: Dict[str, float] = {}
+    # session -> 正在执行的 RunStep 数量；在列的 session 不会被回收或淘汰
+    self._running: Dict[str, int] = {}
+    self._bg_tasks: Set[asyncio.Task] = set()
+    self._reaper_task: Optional[asyncio.Task] = None
+    # 事件时间戳（秒）由后台任务每 _TICK_INTERVAL 秒刷新一次，
+    # 避免每个事件都调用 time.time()；精度误差在 ±_TICK_INTERVAL 以内。
+    # 后台任务只在有 RunStep 执行时运行，空闲的 runtime 不会被定时唤醒
+    self._tick: int = int(time.time())
+    self._ticker_task: Optional[asyncio.Task] = None
+    self._in_flight: int = 0
+
+  def _get_agent(self, session_id: str) -> Optional[BaseAgent]:
+    agent = self._agents.get(session_id)
+    if agent is not None:
+      self._last_used[session_id] = time.monotonic()
+      self._agents.move_to_end(session_id)
+    return agent
 
   def _get_or_create_agent(self, session_id: str) -> BaseAgent:
-    if session_id not in self._agents:
-      self._agents[session_id] = self._agent_factory()
-    return self._agents[session_id]
+    """只在 Configure 中调用：RunStep 不会为未知 session 创建未配置的 Agent。"""
+    self._ensure_reaper()
+    agent = self._get_agent(session_id)
+    if agent is not None:
+      return agent
+
+    # 按 LRU 顺序淘汰，跳过正在执行 RunStep 的 session
+    excess = len(self._agents) - self._max_agents + 1
+    if excess > 0:
+      victims = [sid for sid in self._agents if sid not in self._running][:excess]
+      for old_sid in victims:
+        logger.warning("Agent cache full (%d), evicting session %s", self._max_agents, old_sid)
+        self._evict(old_sid)
+      if len(victims) < excess:
+        logger.warning(
+          "Agent cache full (%d) and all sessions are running, exceeding the limit",
+          self._max_agents,
+        )
+
+    self._last_used[session_id] = time.monotonic()
+    agent = self._agents[session_id] = self._agent_factory()
+    return agent
+
+  def _enter_run(self, session_id: str) -> None:
+    self._running[session_id] = self._running.get(session_id, 0) + 1
+    self._in_flight += 1
+    if self._in_flight == 1:
+      self._tick = int(time.time())
+      self._ticker_task = asyncio.create_task(self._ticker())
+
+  def _exit_run(self, session_id: str) -> None:
+    remaining = self._running.pop(session_id, 1) - 1
+    if remaining > 0:
+      self._running[session_id] = remaining
+    self._in_flight -= 1
+    if self._in_flight == 0:
+      self._stop_ticker()
+
+  def _stop_ticker(self) -> None:
+    task, self._ticker_task = self._ticker_task, None
+    if task is not None:
+      task.cancel()
+
+  def _evict(self, session_id: str) -> None:
+    """立即从缓存中移除，资源清理在后台完成。"""
+    agent = self._agents.pop(session_id, None)
+    self._last_used.pop(session_id, None)
+    if agent is not None:
+      self._spawn(self._release(session_id, agent))
+
+  def _spawn(self, coro) -> None:
+    task = asyncio.create_task(coro)
+    self._bg_tasks.add(task)
+    task.add_done_callback(self._bg_tasks.discard)
+
+  def _ensure_reaper(self) -> None:
+    if self._idle_timeout > 0 and (self._reaper_task is None or self._reaper_task.done()):
+      self._reaper_task = asyncio.create_task(self._reaper())
+
+  async def _ticker(self) -> None:
+    while True:
+      await asyncio.sleep(_TICK_INTERVAL)
+      self._tick = int(time.time())
+
+  async def _reaper(self) -> None:
+    """定期回收长时间没有调用的 session（客户端未调用 Stop 的情况）。"""
+    interval = min(60.0, self._idle_timeout)
+    while True:
+      await asyncio.sleep(interval)
+      deadline = time.monotonic() - self._idle_timeout
+      idle = [
+        sid for sid, ts in self._last_used.items()
+        if ts < deadline and sid not in self._running
+      ]
+      for sid in idle:
+        logger.info("Reaping idle agent for session %s", sid)
+        self._evict(sid)
+
+  async def aclose(self) -> None:
+    """停止后台任务（服务退出时调用）。"""
+    self._stop_ticker()
+    task, self._reaper_task = self._reaper_task, None
+    if task is not None:
+      task.cancel()
+      with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+  async def _release(self, session_id: str, agent: BaseAgent) -> None:
+    try:
+      await agent.cleanup()
+    except Exception as e:
+      logger.warning("Agent cleanup failed for session %s: %s", session_id, e)
 
   async def _cleanup_agent(self, session_id: str) -> None:
     """清理指定 session 的 Agent 资源。"""
     agent = self._agents.pop(session_id, None)
+    self._last_used.pop(session_id, None)
     if agent is not None:
-      try:
-        await agent.cleanup()
-      except Exception as e:
-        logger.warning("Agent cleanup failed for session %s: %s", session_id, e)
+      await self._release(session_id, agent)
 
   async def Configure(self, request, context):
     logger.info("Configure request for session %s", request.session_id)
+    SESSION_ID_VAR.set(request.session_id)
 
     agent = self._get_or_create_agent(request.session_id)
 
-    extra_tools = []
-    for td in request.tools:
-      params = {}
-      if td.parameters_json:
-        try:
-          params = json.loads(td.parameters_json)
-        except json.JSONDecodeError:
-          params = {}
-      extra_tools.append({
+    extra_tools = [
+      {
         "type": "function",
         "function": {
           "name": td.name,
           "description": td.description,
-          "parameters": params,
+          "parameters": _parse_parameters(td.parameters_json),
         },
-      })
+      }
+      for td in request.tools
+    ]
 
     try:
       available = await agent.configure(
@@ -77,26 +220,44 @@ class AgentService(agent_pb2_grpc.AgentServiceServicer):
 
   async def RunStep(self, request, context):
     logger.info("RunStep request for session %s", request.session_id)
+    # 每个 RPC 是独立的 task，需要在这里重新绑定 session 上下文
+    SESSION_ID_VAR.set(request.session_id)
 
-    agent = self._get_or_create_agent(request.session_id)
+    agent = self._get_agent(request.session_id)
+    if agent is None:
+      # 从未 Configure，或因空闲/缓存淘汰被回收：不能悄悄换成一个没有提示词、工具和历史的新 Agent
+      yield agent_pb2.AgentEvent(
+        type=agent_pb2.EventType.EVENT_TYPE_ERROR,
+        content=(
+          f"No configured agent for session {request.session_id} "
+          "(it may have been released after being idle). Call Configure again."
+        ),
+        source="service",
+        timestamp=int(time.time()),
+      )
+      return
+    self._enter_run(request.session_id)
 
     try:
+      # grpc.aio 会 await 每次 yield 对应的写操作，HTTP/2 流控窗口满时这里自然挂起，
+      # 不会在内存中堆积事件；客户端断开后则不再继续驱动 Agent。
       async for event_data in agent.step(request.input_text):
-        yield agent_pb2.AgentEvent(
-          type=event_data.get("type", agent_pb2.EventType.EVENT_TYPE_UNSPECIFIED),
-          content=event_data.get("content", ""),
-          source=event_data.get("source", "agent"),
-          metadata_json=event_data.get("metadata_json", ""),
-          timestamp=int(time.time()),
-        )
+        if context.done():
+          logger.info("RunStep client gone for session %s, stopping", request.session_id)
+          break
+        yield _to_event(event_data, self._tick)
     except Exception as e:
       logger.error("Error in RunStep: %s", e)
       yield agent_pb2.AgentEvent(
         type=agent_pb2.EventType.EVENT_TYPE_ERROR,
         content=str(e),
         source="service",
-        timestamp=int(time.time()),
+        timestamp=self._tick,
       )
+    finally:
+      self._exit_run(request.session_id)
+      if request.session_id in self._last_used:
+        self._last_used[request.session_id] = time.monotonic()
 
   async def Stop(self, request, context):
     logger.info("Stop request for session %s", request.session_id)
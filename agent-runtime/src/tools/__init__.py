@@ -1,3 +1,9 @@
+import importlib
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Mapping, Optional, Sequence
+
 from src.tools.bash_tool import bash_execute, BASH_TOOL_SCHEMA
 from src.tools.file_tool import (
   file_read,
@@ -7,65 +13,126 @@ from src.tools.file_tool import (
   FILE_WRITE_TOOL_SCHEMA,
   LIST_FILES_TOOL_SCHEMA,
 )
-from src.tools.platform_tool import (
-  export_files,
-  EXPORT_FILES_TOOL_SCHEMA,
-)
-from src.tools.compose_tool import (
-  create_compose_stack,
-  teardown_compose_stack,
-  get_compose_stack,
-  CREATE_COMPOSE_STACK_TOOL_SCHEMA,
-  TEARDOWN_COMPOSE_STACK_TOOL_SCHEMA,
-  GET_COMPOSE_STACK_TOOL_SCHEMA,
-)
 
-# name -> (openai-function-schema, async executor)
-TOOL_REGISTRY: dict = {
-  "bash": {
-    "schema": BASH_TOOL_SCHEMA,
-    "executor": bash_execute,
-  },
-  "file_read": {
-    "schema": FILE_READ_TOOL_SCHEMA,
-    "executor": file_read,
-  },
-  "file_write": {
-    "schema": FILE_WRITE_TOOL_SCHEMA,
-    "executor": file_write,
-  },
-  "list_files": {
-    "schema": LIST_FILES_TOOL_SCHEMA,
-    "executor": list_files,
-  },
-  "export_files": {
-    "schema": EXPORT_FILES_TOOL_SCHEMA,
-    "executor": export_files,
-  },
-  "create_compose_stack": {
-    "schema": CREATE_COMPOSE_STACK_TOOL_SCHEMA,
-    "executor": create_compose_stack,
-  },
-  "teardown_compose_stack": {
-    "schema": TEARDOWN_COMPOSE_STACK_TOOL_SCHEMA,
-    "executor": teardown_compose_stack,
-  },
-  "get_compose_stack": {
-    "schema": GET_COMPOSE_STACK_TOOL_SCHEMA,
-    "executor": get_compose_stack,
-  },
+ToolExecutor = Callable[..., Awaitable[str]]
+
+# name -> openai-function-schema（所有 session 共享同一份。MappingProxyType 只让顶层只读，
+# 嵌套的 function/parameters dict 仍可修改，调用方不要改动）
+_SCHEMAS: dict[str, Mapping[str, Any]] = {}
+# name -> async executor
+_EXECUTORS: dict[str, ToolExecutor] = {}
+
+# 依赖 httpx 的 Platform 工具延迟到首次使用时再导入，缩短容器冷启动时间。
+# name -> (module, schema attr, executor attr)
+_TOOL_SPECS: dict[str, tuple[str, str, str]] = {
+  "export_files": ("src.tools.platform_tool", "EXPORT_FILES_TOOL_SCHEMA", "export_files"),
+  "create_compose_stack": (
+    "src.tools.compose_tool", "CREATE_COMPOSE_STACK_TOOL_SCHEMA", "create_compose_stack"
+  ),
+  "teardown_compose_stack": (
+    "src.tools.compose_tool", "TEARDOWN_COMPOSE_STACK_TOOL_SCHEMA", "teardown_compose_stack"
+  ),
+  "get_compose_stack": (
+    "src.tools.compose_tool", "GET_COMPOSE_STACK_TOOL_SCHEMA", "get_compose_stack"
+  ),
+}
+
+# 供 `from src.tools import create_compose_stack` 等旧用法的模块级懒加载属性
+_LAZY_ATTRS: dict[str, str] = {
+  attr: module
+  for module, schema_attr, executor_attr in _TOOL_SPECS.values()
+  for attr in (schema_attr, executor_attr)
 }
 
 
-def get_tool_schemas(names: list[str]) -> list[dict]:
-  schemas = []
-  for name in names:
-    entry = TOOL_REGISTRY.get(name)
-    if entry:
-      schemas.append(entry["schema"])
-  return schemas
+def __getattr__(name: str) -> Any:
+  module = _LAZY_ATTRS.get(name)
+  if module is None:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  value = getattr(importlib.import_module(module), name)
+  globals()[name] = value
+  return value
+
+
+@lru_cache(maxsize=128)
+def _schemas_for(names: tuple[str, ...]) -> tuple[Mapping[str, Any], ...]:
+  # 以 tuple 作为缓存键而非 frozenset，保持调用方给出的工具顺序
+  return tuple(s for n in names if (s := get_tool_schema(n)) is not None)
+
+
+def register_tool(name: str, schema: dict, executor: ToolExecutor) -> None:
+  _SCHEMAS[name] = MappingProxyType(schema)
+  _EXECUTORS[name] = executor
+  _schemas_for.cache_clear()
+  get_tool_executor.cache_clear()
+
+
+def _resolve(name: str) -> bool:
+  """确保 name 对应的工具已加载，返回是否存在。"""
+  if name in _EXECUTORS:
+    return True
+  spec = _TOOL_SPECS.get(name)
+  if spec is None:
+    return False
+  module_path, schema_attr, executor_attr = spec
+  module = importlib.import_module(module_path)
+  register_tool(name, getattr(module, schema_attr), getattr(module, executor_attr))
+  return True
+
+
+def get_tool_schemas(names: list[str]) -> tuple[Mapping[str, Any], ...]:
+  return _schemas_for(tuple(names))
+
+
+def get_tool_schema(name: str) -> Optional[Mapping[str, Any]]:
+  if not _resolve(name):
+    return None
+  return _SCHEMAS.get(name)
+
+
+@lru_cache(maxsize=64)
+def get_tool_executor(name: str) -> Optional[ToolExecutor]:
+  if not _resolve(name):
+    return None
+  return _EXECUTORS.get(name)
+
+
+# 只读工具：既不互相影响，也不改变其他工具看到的状态
+_CONCURRENT_SAFE_TOOLS: frozenset[str] = frozenset({"file_read", "list_files", "get_compose_stack"})
+
+
+def batch_tool_calls(names: Sequence[str]) -> list[slice]:
+  """把一轮中的工具调用按模型给出的顺序切分成批次。
+
+  相邻的只读调用合为一批并发执行；其余调用（bash、file_write、Platform 写操作及未知工具）
+  各自单独成批，等之前的批次全部完成后才执行，有依赖的调用始终按顺序生效。
+  """
+  batches: list[slice] = []
+  start = 0
+  for i, name in enumerate(names):
+    if name not in _CONCURRENT_SAFE_TOOLS:
+      if start < i:
+        batches.append(slice(start, i))
+      batches.append(slice(i, i + 1))
+      start = i + 1
+  if start < len(names):
+    batches.append(slice(start, len(names)))
+  return batches
+
+
+async def aclose_tools() -> None:
+  """关闭已加载的工具模块持有的共享资源（如 HTTP 连接池）。未加载的模块不会被导入。"""
+  for module_path in {spec[0] for spec in _TOOL_SPECS.values()}:
+    module = sys.modules.get(module_path)
+    aclose = getattr(module, "aclose", None)
+    if aclose is not None:
+      await aclose()
+
 
+register_tool("bash", BASH_TOOL_SCHEMA, bash_execute)
+register_tool("file_read", FILE_READ_TOOL_SCHEMA, file_read)
+register_tool("file_write", FILE_WRITE_TOOL_SCHEMA, file_write)
+register_tool("list_files", LIST_FILES_TOOL_SCHEMA, list_files)
 
-def get_tool_executor(name: str):
-  entry = TOOL_REGISTRY.get(name)
-  return entry["executor"] if entry else None
\ No newline at end of file
+# 内置工具（含尚未加载的懒加载工具）的名称，之后只读
+FROZEN_TOOL_NAMES: frozenset[str] = frozenset(_SCHEMAS) | frozenset(_TOOL_SPECS)
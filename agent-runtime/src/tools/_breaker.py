@@ -0,0 +1,98 @@
+import logging
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(str, Enum):
+  CLOSED = "closed"        # 正常放行
+  OPEN = "open"            # 快速失败，直到 reset_timeout 过去
+  HALF_OPEN = "half_open"  # 放行一个探测请求，成功则恢复 CLOSED
+
+
+class CircuitOpenError(Exception):
+  """熔断器处于 OPEN 状态时抛出，调用未被执行。"""
+
+
+class CircuitBreaker:
+  """
+  CLOSED → OPEN → HALF_OPEN 三态熔断器。
+
+  连续 fail_threshold 次失败（仅统计 failure_types 中的异常）后进入 OPEN，
+  在 reset_timeout 秒内所有调用直接抛出 CircuitOpenError；
+  之后放行一个探测请求（HALF_OPEN），成功则关闭，失败则重新打开。
+  """
+
+  def __init__(
+    self,
+    name: str,
+    fail_threshold: int = 5,
+    reset_timeout: float = 30.0,
+    failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+  ):
+    self.name = name
+    self.fail_threshold = fail_threshold
+    self.reset_timeout = reset_timeout
+    self.failure_types = failure_types
+    self.state = CircuitState.CLOSED
+    self.failure_count = 0
+    self.opened_at = 0.0
+    self._probe_in_flight = False
+
+  def _before_call(self) -> None:
+    if self.state == CircuitState.OPEN:
+      if time.monotonic() - self.opened_at < self.reset_timeout:
+        raise CircuitOpenError(f"circuit '{self.name}' is open")
+      self.state = CircuitState.HALF_OPEN
+      logger.info("Circuit %s half-open, allowing a probe request", self.name)
+    if self.state == CircuitState.HALF_OPEN:
+      if self._probe_in_flight:
+        raise CircuitOpenError(f"circuit '{self.name}' is half-open, probe in flight")
+      self._probe_in_flight = True
+
+  def _on_success(self) -> None:
+    if self.state != CircuitState.CLOSED:
+      logger.info("Circuit %s closed", self.name)
+    self.state = CircuitState.CLOSED
+    self.failure_count = 0
+    self._probe_in_flight = False
+
+  def _on_failure(self) -> None:
+    self.failure_count += 1
+    self._probe_in_flight = False
+    if self.state == CircuitState.HALF_OPEN or self.failure_count >= self.fail_threshold:
+      if self.state != CircuitState.OPEN:
+        logger.warning(
+          "Circuit %s opened after %d consecutive failures", self.name, self.failure_count
+        )
+      self.state = CircuitState.OPEN
+      self.opened_at = time.monotonic()
+
+  async def call(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    self._before_call()
+    try:
+      result = await fn(*args, **kwargs)
+    except self.failure_types:
+      self._on_failure()
+      raise
+    except BaseException:
+      # 非目标异常不计入失败，但要释放探测名额
+      self._probe_in_flight = False
+      raise
+    self._on_success()
+    return result
+
+
+# key（通常是目标 host）-> 熔断器
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(key: str, **kwargs: Any) -> CircuitBreaker:
+  breaker = _BREAKERS.get(key)
+  if breaker is None:
+    breaker = _BREAKERS[key] = CircuitBreaker(key, **kwargs)
+  return breaker
@@ -1,13 +1,18 @@
 import asyncio
+import codecs
+import functools
 import logging
 import os
 import re
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.context import current_session_id
 
 logger = logging.getLogger(__name__)
 
 MAX_OUTPUT_CHARS = 30_000
 DEFAULT_TIMEOUT = 120
+_READ_CHUNK = 64 * 1024
 
 # ── apt / system-package-manager guard ──────────────────────────────
 # Matches commands like: apt-get install, apt install, sudo apt-get,
@@ -22,6 +27,17 @@ _APT_PATTERN = re.compile(
   re.IGNORECASE,
 )
 
+# _APT_PATTERN 能匹配的命令必然包含其中之一；先做子串检查，绝大多数命令无需进入正则
+_FAST_TOKENS = ("apt", "dpkg")
+
+
+def _is_apt_command(command: str) -> bool:
+  low = command.lower()
+  if not any(tok in low for tok in _FAST_TOKENS):
+    return False
+  return _APT_PATTERN.search(command) is not None
+
+
 _APT_BLOCKED_MSG = (
   "[BLOCKED] System package commands (apt-get, apt, dpkg) are disabled in this sandbox.\n"
   "\n"
@@ -68,13 +84,60 @@ BASH_TOOL_SCHEMA: Dict[str, Any] = {
 }
 
 
+@functools.lru_cache(maxsize=64)
+def _session_env(session_id: str) -> Dict[str, str]:
+  # Platform 不会把 SESSION_ID 注入容器环境，session 内每次调用都要补充；
+  # 按 session id 缓存合并后的环境，每个 session 只复制一次 os.environ（只读共享，不要修改）
+  return {**os.environ, "SESSION_ID": session_id}
+
+
+def _subprocess_env() -> Optional[Dict[str, str]]:
+  """子进程环境：无需补充 session id 时直接继承（None）。"""
+  session_id = current_session_id()
+  if not session_id or os.environ.get("SESSION_ID") == session_id:
+    return None
+  return _session_env(session_id)
+
+
+async def _drain(stream: asyncio.StreamReader, limit: int) -> Tuple[str, int, bool]:
+  """读完 stream，边读边解码前 limit 个字符，返回 (文本, 总字节数, 是否有丢弃)。"""
+  decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+  parts: list[str] = []
+  kept = 0
+  total = 0
+  while kept < limit:
+    chunk = await stream.read(_READ_CHUNK)
+    if not chunk:
+      parts.append(decoder.decode(b"", final=True))
+      return "".join(parts), total, False
+    total += len(chunk)
+    text = decoder.decode(chunk)
+    parts.append(text)
+    kept += len(text)
+
+  # 保留窗口已满：继续读取并丢弃，防止子进程因管道写满而阻塞。
+  # 输出恰好为 limit 个字符时什么都没丢，不能标记为截断
+  dropped = kept > limit
+  while True:
+    chunk = await stream.read(_READ_CHUNK)
+    if not chunk:
+      break
+    total += len(chunk)
+    dropped = True
+  if not dropped:
+    tail = decoder.decode(b"", final=True)
+    parts.append(tail)
+    dropped = kept + len(tail) > limit
+  return "".join(parts)[:limit], total, dropped
+
+
 async def bash_execute(
   command: str,
   timeout: int = DEFAULT_TIMEOUT,
   **_kwargs: Any,
 ) -> str:
   """Run *command* via ``/bin/bash -c`` and return combined output."""
-  if _APT_PATTERN.search(command):
+  if _is_apt_command(command):
     logger.warning("bash: BLOCKED apt command: %r", command)
     return _APT_BLOCKED_MSG
 
@@ -87,18 +150,23 @@ async def bash_execute(
       stdout=asyncio.subprocess.PIPE,
       stderr=asyncio.subprocess.PIPE,
       cwd=workspace,
-      env={**os.environ},
+      env=_subprocess_env(),
+    )
+    # 边读边丢弃超出上限的部分，内存占用与输出总量无关
+    (out, out_total, out_dropped), (err, err_total, err_dropped), _ = await asyncio.wait_for(
+      asyncio.gather(
+        _drain(proc.stdout, MAX_OUTPUT_CHARS),
+        _drain(proc.stderr, MAX_OUTPUT_CHARS),
+        proc.wait(),
+      ),
+      timeout=timeout,
     )
-    stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
   except asyncio.TimeoutError:
     proc.kill()
     return f"[ERROR] Command timed out after {timeout}s"
   except Exception as exc:
     return f"[ERROR] {exc}"
 
-  out = stdout.decode(errors="replace")
-  err = stderr.decode(errors="replace")
-
   parts = []
   if out:
     parts.append(out)
@@ -107,11 +175,15 @@ async def bash_execute(
 
   result = "\n".join(parts) if parts else "(no output)"
 
-  if len(result) > MAX_OUTPUT_CHARS:
-    result = result[:MAX_OUTPUT_CHARS] + f"\n... [truncated, {len(result)} chars total]"
+  dropped = out_dropped or err_dropped
+  if dropped or len(result) > MAX_OUTPUT_CHARS:
+    total_desc = (
+      f"{out_total + err_total} bytes total" if dropped else f"{len(result)} chars total"
+    )
+    result = result[:MAX_OUTPUT_CHARS] + f"\n... [truncated, {total_desc}]"
 
   exit_code = proc.returncode
   if exit_code != 0:
     result += f"\n[exit code: {exit_code}]"
 
-  return result
\ No newline at end of file
+  return result
@@ -1,14 +1,41 @@
+import asyncio
 import json
 import logging
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import httpx
 
 from src.config import settings
+from src.core.context import current_session_id
 
 logger = logging.getLogger(__name__)
 
+# 所有 compose 调用共享一个连接池，避免每次调用都重新建立 TCP 连接
+_PLATFORM_CLIENT: Optional[httpx.AsyncClient] = None
+_CLIENT_LOCK = asyncio.Lock()
+
+
+async def _get_client() -> httpx.AsyncClient:
+  global _PLATFORM_CLIENT
+  if _PLATFORM_CLIENT is None:
+    async with _CLIENT_LOCK:
+      if _PLATFORM_CLIENT is None:
+        _PLATFORM_CLIENT = httpx.AsyncClient(
+          http2=True,
+          timeout=120.0,
+          limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60),
+        )
+  return _PLATFORM_CLIENT
+
+
+async def aclose() -> None:
+  """关闭共享的 HTTP 客户端（runtime 退出时调用）。"""
+  global _PLATFORM_CLIENT
+  if _PLATFORM_CLIENT is not None:
+    await _PLATFORM_CLIENT.aclose()
+    _PLATFORM_CLIENT = None
+
 # Tool Schema: create_compose_stack
 
 CREATE_COMPOSE_STACK_TOOL_SCHEMA: Dict[str, Any] = {
@@ -102,7 +129,7 @@ async def create_compose_stack(
   compose_file: str = "",
   **_kwargs: Any,
 ) -> str:
-  session_id = settings.SESSION_ID or os.environ.get("SESSION_ID", "")
+  session_id = current_session_id() or settings.SESSION_ID or os.environ.get("SESSION_ID", "")
   platform_url = settings.PLATFORM_API_URL
 
   if not session_id:
@@ -123,8 +150,8 @@ async def create_compose_stack(
   logger.info("create_compose_stack: POST %s", url)
 
   try:
-    async with httpx.AsyncClient(timeout=120.0) as client:
-      resp = await client.post(url, json=payload)
+    client = await _get_client()
+    resp = await client.post(url, json=payload, timeout=120.0)
 
     if resp.status_code >= 400:
       return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
@@ -151,7 +178,7 @@ async def create_compose_stack(
 
 
 async def teardown_compose_stack(**_kwargs: Any) -> str:
-  session_id = settings.SESSION_ID or os.environ.get("SESSION_ID", "")
+  session_id = current_session_id() or settings.SESSION_ID or os.environ.get("SESSION_ID", "")
   platform_url = settings.PLATFORM_API_URL
 
   if not session_id:
@@ -164,8 +191,8 @@ async def teardown_compose_stack(**_kwargs: Any) -> str:
   logger.info("teardown_compose_stack: DELETE %s", url)
 
   try:
-    async with httpx.AsyncClient(timeout=60.0) as client:
-      resp = await client.delete(url)
+    client = await _get_client()
+    resp = await client.delete(url, timeout=60.0)
 
     if resp.status_code >= 400:
       return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
@@ -180,7 +207,7 @@ async def teardown_compose_stack(**_kwargs: Any) -> str:
 
 
 async def get_compose_stack(**_kwargs: Any) -> str:
-  session_id = settings.SESSION_ID or os.environ.get("SESSION_ID", "")
+  session_id = current_session_id() or settings.SESSION_ID or os.environ.get("SESSION_ID", "")
   platform_url = settings.PLATFORM_API_URL
 
   if not session_id:
@@ -193,8 +220,8 @@ async def get_compose_stack(**_kwargs: Any) -> str:
   logger.info("get_compose_stack: GET %s", url)
 
   try:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-      resp = await client.get(url)
+    client = await _get_client()
+    resp = await client.get(url, timeout=30.0)
 
     if resp.status_code >= 400:
       return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
 
@@ -7,11 +9,17 @@ logger = logging.getLogger(__name__)
 
 MAX_READ_CHARS = 50_000
 
+@lru_cache(maxsize=4)
+def _workspace_base(workspace: str) -> Path:
+  # 工作区根目录在容器生命周期内不变，resolve 一次即可
+  return Path(workspace).resolve()
+
+
 def _resolve_safe(relative_path: str) -> str:
-  workspace = os.environ.get("WORKSPACE_DIR", "/app/workspace")
-  base = Path(workspace).resolve()
+  base = _workspace_base(os.environ.get("WORKSPACE_DIR", "/app/workspace"))
   target = (base / relative_path).resolve()
-  if not str(target).startswith(str(base)):
+  # is_relative_to 按路径组件比较，/app/workspace-evil 不会被误判为在 /app/workspace 内
+  if not target.is_relative_to(base):
     raise ValueError(f"Path escapes workspace: {relative_path}")
   return str(target)
 
@@ -46,6 +54,31 @@ FILE_READ_TOOL_SCHEMA: Dict[str, Any] = {
 }
 
 
+def _read_text(target: str, start_line: int | None, end_line: int | None) -> str:
+  total_desc = ""
+  with open(target, "r", encoding="utf-8", errors="replace") as fh:
+    if start_line or end_line:
+      # 逐行迭代，只保留请求的区间，不把整个文件读入内存
+      buf: list[str] = []
+      for i, line in enumerate(fh, 1):
+        if start_line and i < start_line:
+          continue
+        if end_line and i > end_line:
+          break
+        buf.append(line)
+      content = "".join(buf)
+    else:
+      # 多读一个字符即可判断是否需要截断
+      content = fh.read(MAX_READ_CHARS + 1)
+      if len(content) > MAX_READ_CHARS:
+        total_desc = f"{os.fstat(fh.fileno()).st_size} bytes total"
+
+  if len(content) > MAX_READ_CHARS:
+    total_desc = total_desc or f"{len(content)} chars total"
+    content = content[:MAX_READ_CHARS] + f"\n... [truncated, {total_desc}]"
+  return content
+
+
 async def file_read(
   path: str,
   start_line: int | None = None,
@@ -56,23 +89,13 @@ async def file_read(
   logger.info("file_read: %s (lines %s–%s)", target, start_line, end_line)
 
   try:
-    with open(target, "r", encoding="utf-8", errors="replace") as fh:
-      if start_line or end_line:
-        lines = fh.readlines()
-        s = (start_line or 1) - 1
-        e = end_line or len(lines)
-        content = "".join(lines[s:e])
-      else:
-        content = fh.read()
+    # 阻塞的文件 IO 放到线程池，避免大文件读取卡住其他 session 的事件循环
+    return await asyncio.to_thread(_read_text, target, start_line, end_line)
   except FileNotFoundError:
     return f"[ERROR] File not found: {path}"
   except Exception as exc:
     return f"[ERROR] {exc}"
 
-  if len(content) > MAX_READ_CHARS:
-    content = content[:MAX_READ_CHARS] + f"\n... [truncated, {len(content)} chars total]"
-  return content
-
 
 FILE_WRITE_TOOL_SCHEMA: Dict[str, Any] = {
   "type": "function",
@@ -104,6 +127,25 @@ FILE_WRITE_TOOL_SCHEMA: Dict[str, Any] = {
 }
 
 
+def _write_text(target: str, content: str, append: bool) -> None:
+  # 一次编码后直接写原始 fd，绕过 TextIOWrapper 的编码与缓冲层
+  data = content.encode("utf-8")
+  flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC)
+  try:
+    fd = os.open(target, flags, 0o644)
+  except FileNotFoundError:
+    # 父目录不存在时才创建，常见情况下省去 mkdir 系统调用
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd = os.open(target, flags, 0o644)
+  try:
+    view = memoryview(data)
+    while view:
+      written = os.write(fd, view)
+      view = view[written:]
+  finally:
+    os.close(fd)
+
+
 async def file_write(
   path: str,
   content: str,
@@ -115,10 +157,7 @@ async def file_write(
   logger.info("file_write: %s (append=%s, %d chars)", target, append, len(content))
 
   try:
-    os.makedirs(os.path.dirname(target), exist_ok=True)
-    mode = "a" if append else "w"
-    with open(target, mode, encoding="utf-8") as fh:
-      fh.write(content)
+    await asyncio.to_thread(_write_text, target, content, append)
     return f"Successfully wrote {len(content)} chars to {path}"
   except Exception as exc:
     return f"[ERROR] {exc}"
@@ -150,6 +189,48 @@ LIST_FILES_TOOL_SCHEMA: Dict[str, Any] = {
 }
 
 
+def _scan_dir(path: str) -> tuple[list[str], list[str]]:
+  """单次 scandir，返回排好序的 (子目录, 文件)。"""
+  dirs: list[str] = []
+  files: list[str] = []
+  try:
+    with os.scandir(path) as it:
+      for e in it:
+        (dirs if e.is_dir(follow_symlinks=False) else files).append(e.name)
+  except OSError:
+    # 与 os.walk 一致：无法读取的子目录直接跳过
+    pass
+  dirs.sort()
+  files.sort()
+  return dirs, files
+
+
+def _list_dir(target: str, path: str, recursive: bool) -> str:
+  if not os.path.isdir(target):
+    return f"[ERROR] Not a directory: {path}"
+
+  entries: list[str] = []
+
+  if recursive:
+    # 手动维护 scandir 栈：每个目录只扫描一次，类型信息直接取自 dirent
+    stack = [(target, ".")]
+    while stack:
+      root, rel_root = stack.pop()
+      dirs, files = _scan_dir(root)
+      for d in dirs:
+        entries.append(os.path.join(rel_root, d) + "/")
+      for f in files:
+        entries.append(os.path.join(rel_root, f))
+      for d in reversed(dirs):
+        stack.append((os.path.join(root, d), os.path.join(rel_root, d)))
+  else:
+    with os.scandir(target) as it:
+      listing = sorted((e.name, e.is_dir(follow_symlinks=False)) for e in it)
+    entries = [name + "/" if is_dir else name for name, is_dir in listing]
+
+  return "\n".join(entries) if entries else "(empty directory)"
+
+
 async def list_files(
   path: str = ".",
   recursive: bool = False,
@@ -160,27 +241,6 @@ async def list_files(
   logger.info("list_files: %s (recursive=%s)", target, recursive)
 
   try:
-    if not os.path.isdir(target):
-      return f"[ERROR] Not a directory: {path}"
-
-    entries: list[str] = []
-
-    if recursive:
-      for root, dirs, files in os.walk(target):
-        rel_root = os.path.relpath(root, target)
-        for d in sorted(dirs):
-          entries.append(os.path.join(rel_root, d) + "/")
-        for f in sorted(files):
-          entries.append(os.path.join(rel_root, f))
-    else:
-      for entry in sorted(os.listdir(target)):
-        full = os.path.join(target, entry)
-        if os.path.isdir(full):
-          entries.append(entry + "/")
-        else:
-          entries.append(entry)
-
-    return "\n".join(entries) if entries else "(empty directory)"
-
+    return await asyncio.to_thread(_list_dir, target, path, recursive)
   except Exception as exc:
-    return f"[ERROR] {exc}"
\ No newline at end of file
+    return f"[ERROR] {exc}"
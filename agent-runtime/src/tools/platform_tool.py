@@ -1,14 +1,174 @@
-import json
+import asyncio
+import contextlib
+import functools
 import logging
 import os
-from typing import Any, Dict
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Union
 
 import httpx
+import orjson
 
 from src.config import settings
+from src.core.context import current_session_id
+from src.tools._breaker import CircuitBreaker, CircuitOpenError, get_breaker
 
 logger = logging.getLogger(__name__)
 
+# 各操作的读超时（秒）
+HTTP_TIMEOUTS: Dict[str, float] = {"create": 60.0, "remove": 30.0, "export": 120.0}
+
+# 分层超时：读超时按操作区分，连接/写/取连接池快速失败，Platform 宕机时约 2 秒即可发现
+_TIMEOUTS: Dict[str, httpx.Timeout] = {
+  op: httpx.Timeout(read, connect=2.0, write=5.0, pool=1.0) for op, read in HTTP_TIMEOUTS.items()
+}
+
+_NO_SESSION_MSG = "[ERROR] SESSION_ID not set — cannot call Platform API."
+_NO_PLATFORM_MSG = "[ERROR] PLATFORM_API_URL not set — cannot call Platform API."
+
+
+@functools.cache
+def _creds() -> Union[Tuple[str, str], str]:
+  # 配置在进程内不变：只校验一次，缓存 (Platform 地址, 兜底会话 ID) 或配置错误信息。
+  # 测试中修改配置后调用 _creds.cache_clear()，地址和熔断器都会随之更新
+  platform_url = (settings.PLATFORM_API_URL or "").rstrip("/")
+  if not platform_url:
+    return _NO_PLATFORM_MSG
+  return platform_url, settings.SESSION_ID or os.environ.get("SESSION_ID", "")
+
+
+def _session_url() -> Tuple[str, str, str]:
+  # 返回 (Platform 地址, 当前会话的 URL 前缀, "") 或 ("", "", 错误信息)。
+  # 会话 ID 每次调用都从 ContextVar 读取，同一进程会服务多个会话，不能缓存
+  creds = _creds()
+  if isinstance(creds, str):
+    return "", "", creds
+  platform_url, default_session_id = creds
+  session_id = current_session_id() or default_session_id
+  if not session_id:
+    return "", "", _NO_SESSION_MSG
+  return platform_url, f"{platform_url}/api/v1/sessions/{session_id}", ""
+
+# 请求体由 orjson 预先编码，避免 httpx 再用标准库 json 序列化一遍
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 所有 Platform API 调用共享一个连接池，复用 keep-alive 连接。
+# 开启 HTTP/2 后（经 TLS 的 ALPN 协商），并发调用在同一连接上多路复用，连接数上限可以收小；
+# Platform 走明文 HTTP 时 httpx 仍使用 HTTP/1.1
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+  global _client
+  if _client is None:
+    _client = httpx.AsyncClient(
+      http2=True,
+      limits=httpx.Limits(max_keepalive_connections=10, max_connections=50),
+      timeout=httpx.Timeout(120.0, connect=2.0, write=5.0, pool=1.0),
+    )
+  return _client
+
+
+_CIRCUIT_OPEN_MSG = (
+  "[ERROR] Platform unavailable (circuit open) — recent calls to the Platform API "
+  "failed to connect. Try again later."
+)
+
+
+# 舱壁隔离：每类接口独立的并发上限，慢速的 export 不会占满 create/remove 的名额
+_BULKHEAD_LIMITS: Dict[str, int] = {"services": 8, "export": 2}
+_BULKHEAD_WARN_AFTER = 1.0
+
+
+@functools.lru_cache(maxsize=None)
+def _semaphore(kind: str) -> asyncio.Semaphore:
+  # 首次使用时才创建，保证在运行中的事件循环内
+  return asyncio.Semaphore(_BULKHEAD_LIMITS[kind])
+
+
+@contextlib.asynccontextmanager
+async def _bulkhead(kind: str) -> AsyncIterator[None]:
+  sem = _semaphore(kind)
+  # 排队超过 1 秒时打一条告警，方便看出调用正在被限流
+  warn = asyncio.get_running_loop().call_later(
+    _BULKHEAD_WARN_AFTER,
+    logger.warning,
+    "Platform %s calls throttled: waiting for one of %d slots",
+    kind,
+    _BULKHEAD_LIMITS[kind],
+  )
+  try:
+    await sem.acquire()
+  finally:
+    warn.cancel()
+  try:
+    yield
+  finally:
+    sem.release()
+
+
+# Platform 熔断器，按地址共享；只有连接失败和连接/读写超时计入失败，4xx/5xx 响应不算。
+# PoolTimeout 只说明本地连接池排队，与 Platform 是否可用无关，也不计入
+def _platform_breaker(platform_url: str) -> CircuitBreaker:
+  return get_breaker(
+    platform_url,
+    fail_threshold=5,
+    reset_timeout=30.0,
+    failure_types=(httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.WriteTimeout),
+  )
+
+
+# 瞬时错误：连接失败、读超时、连接被对端中途断开，以及网关类 5xx；4xx 一律不重试
+_RETRYABLE_ERRORS = (
+  httpx.ConnectError,
+  httpx.ConnectTimeout,
+  httpx.ReadTimeout,
+  httpx.RemoteProtocolError,
+)
+_RETRYABLE_STATUS = frozenset({502, 503, 504})
+# 连接未建立：请求一定没有送达 Platform
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+async def _retry(
+  fn: Callable[[], Awaitable[httpx.Response]],
+  *,
+  attempts: int = 3,
+  base: float = 0.1,
+  max_delay: float = 2.0,
+  retry_on: tuple[type[BaseException], ...] = _RETRYABLE_ERRORS,
+  retry_status: frozenset[int] = _RETRYABLE_STATUS,
+) -> httpx.Response:
+  # 指数退避 + full jitter。熔断器套在 _retry 外层，一次逻辑调用（含全部重试）只记一次成功/失败。
+  # Platform 不支持幂等键：会产生副作用的请求由调用方收窄 retry_on / retry_status，
+  # 避免读超时后在 Platform 仍在处理时重复提交
+  for attempt in range(attempts - 1):
+    try:
+      resp = await fn()
+    except retry_on as exc:
+      reason = type(exc).__name__
+    else:
+      if resp.status_code not in retry_status:
+        return resp
+      reason = f"HTTP {resp.status_code}"
+      # 流式响应的连接要先归还连接池再重试
+      await resp.aclose()
+    delay = random.uniform(0, min(max_delay, base * 2 ** attempt))
+    logger.warning(
+      "Platform call failed (%s), retry %d/%d in %.2fs", reason, attempt + 1, attempts - 1, delay
+    )
+    await asyncio.sleep(delay)
+  return await fn()
+
+
+async def aclose() -> None:
+  """关闭共享的 HTTP 客户端（runtime 退出时调用）。"""
+  global _client
+  if _client is not None:
+    await _client.aclose()
+    _client = None
+
 # TODO：这些是新写的 Go Platform 专用工具，只是封装了Go Platform相关方法，待测试和完善
 CREATE_SERVICE_TOOL_SCHEMA: Dict[str, Any] = {
   "type": "function",
@@ -116,15 +276,11 @@ async def create_service(
   cmd: list[str] | None = None,
   **_kwargs: Any,
 ) -> str:
-  session_id = settings.SESSION_ID or os.environ.get("SESSION_ID", "")
-  platform_url = settings.PLATFORM_API_URL
-
-  if not session_id:
-    return "[ERROR] SESSION_ID not set — cannot call Platform API."
-  if not platform_url:
-    return "[ERROR] PLATFORM_API_URL not set — cannot call Platform API."
+  platform_url, session_url, error = _session_url()
+  if error:
+    return error
 
-  url = f"{platform_url}/api/v1/sessions/{session_id}/services"
+  url = f"{session_url}/services"
   payload = {
     "name": name,
     "image": image,
@@ -132,26 +288,38 @@ async def create_service(
     "cmd": cmd or [],
   }
 
-  logger.info("create_service: POST %s payload=%s", url, json.dumps(payload)[:200])
+  body = orjson.dumps(payload)
+  if logger.isEnabledFor(logging.INFO):
+    logger.info("create_service: POST %s payload=%s", url, body[:200].decode(errors="replace"))
 
   try:
-    async with httpx.AsyncClient(timeout=60.0) as client:
-      resp = await client.post(url, json=payload)
+    client = _get_client()
+    async with _bulkhead("services"):
+      resp = await _platform_breaker(platform_url).call(
+        _retry,
+        functools.partial(
+          client.post, url, content=body, headers=_JSON_HEADERS, timeout=_TIMEOUTS["create"]
+        ),
+        # create 不幂等：只在连接未建立时重试，网关 5xx 时请求可能已经送达
+        retry_on=_CONNECT_ERRORS,
+        retry_status=frozenset(),
+      )
 
     if resp.status_code >= 400:
       return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
 
-    data = resp.json()
-    result_lines = [
-      f"Service created successfully:",
-      f"  service_id: {data.get('service_id', 'unknown')}",
-      f"  name: {data.get('name', name)}",
-      f"  ip: {data.get('ip', 'unknown')}",
-      f"  status: {data.get('status', 'unknown')}",
-    ]
-    return "\n".join(result_lines)
-
-  except httpx.ConnectError:
+    data = orjson.loads(resp.content)
+    return (
+      f"Service created successfully:\n"
+      f"  service_id: {data.get('service_id', 'unknown')}\n"
+      f"  name: {data.get('name', name)}\n"
+      f"  ip: {data.get('ip', 'unknown')}\n"
+      f"  status: {data.get('status', 'unknown')}"
+    )
+
+  except CircuitOpenError:
+    return _CIRCUIT_OPEN_MSG
+  except (httpx.ConnectError, httpx.ConnectTimeout):
     return f"[ERROR] Cannot connect to Platform API at {platform_url}. Is the Go Platform running?"
   except Exception as exc:
     logger.error("create_service failed: %s", exc)
@@ -163,74 +331,141 @@ async def remove_service(
   **_kwargs: Any,
 ) -> str:
   # TODO：调用 Go Platform API 删除一个伴随服务容器
-  session_id = settings.SESSION_ID or os.environ.get("SESSION_ID", "")
-  platform_url = settings.PLATFORM_API_URL
+  platform_url, session_url, error = _session_url()
+  if error:
+    return error
 
-  if not session_id:
-    return "[ERROR] SESSION_ID not set — cannot call Platform API."
-  if not platform_url:
-    return "[ERROR] PLATFORM_API_URL not set — cannot call Platform API."
-
-  url = f"{platform_url}/api/v1/sessions/{session_id}/services/{service_id}"
+  url = f"{session_url}/services/{service_id}"
 
   logger.info("remove_service: DELETE %s", url)
 
   try:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-      resp = await client.delete(url)
+    client = _get_client()
+    async with _bulkhead("services"):
+      resp = await _platform_breaker(platform_url).call(
+        _retry, functools.partial(client.delete, url, timeout=_TIMEOUTS["remove"])
+      )
 
     if resp.status_code >= 400:
       return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
 
     return f"Service {service_id} removed successfully."
 
-  except httpx.ConnectError:
+  except CircuitOpenError:
+    return _CIRCUIT_OPEN_MSG
+  except (httpx.ConnectError, httpx.ConnectTimeout):
     return f"[ERROR] Cannot connect to Platform API at {platform_url}."
   except Exception as exc:
     logger.error("remove_service failed: %s", exc)
     return f"[ERROR] remove_service failed: {exc}"
 
 
+# 每个会话最近一次成功导出的 (时间戳, 结果)；Platform 不可达时在 TTL 内作为降级结果返回，
+# 让 agent 知道上次导出的状态，而不是在下一轮里反复重试
+_last_export: Dict[str, Tuple[float, str]] = {}  # 以会话 URL 为键
+_STALE_EXPORT_TTL = 300.0
+
+
+def _remember_export(session_url: str, result: str) -> None:
+  # 写入时顺带清理过期条目，已结束会话的结果不会一直留在进程里
+  now = time.time()
+  for key in [k for k, (ts, _) in _last_export.items() if now - ts > _STALE_EXPORT_TTL]:
+    del _last_export[key]
+  _last_export[session_url] = (now, result)
+
+
+def _stale_export(session_url: str, error: str) -> str:
+  cached = _last_export.get(session_url)
+  if cached is None:
+    return error
+  exported_at, result = cached
+  age = time.time() - exported_at
+  if age > _STALE_EXPORT_TTL:
+    return error
+  return (
+    f"[STALE] {error}\n"
+    f"This export was NOT performed. Last successful export for this session was "
+    f"{age:.0f}s ago (at {time.strftime('%H:%M:%S', time.localtime(exported_at))}):\n"
+    f"{result}"
+  )
+
+
+_JSONL_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+
+
+async def _read_export_result(resp: httpx.Response) -> Dict[str, Any]:
+  # 流式（JSONL）响应逐行解析进度事件，只保留最后一条作为汇总；
+  # 普通 JSON 响应（当前 Platform 的行为）整体读取
+  content_type = resp.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+  if content_type not in _JSONL_CONTENT_TYPES:
+    return orjson.loads(await resp.aread())
+
+  summary: Dict[str, Any] = {}
+  async for line in resp.aiter_lines():
+    if not line.strip():
+      continue
+    summary = orjson.loads(line)
+    logger.info("export_files progress: %s", line[:200])
+  return summary
+
+
 async def export_files(
   src_path: str = "",
   dest_path: str = "",
   **_kwargs: Any,
 ) -> str:
-  session_id = settings.SESSION_ID or os.environ.get("SESSION_ID", "")
-  platform_url = settings.PLATFORM_API_URL
+  platform_url, session_url, error = _session_url()
+  if error:
+    return error
 
-  if not session_id:
-    return "[ERROR] SESSION_ID not set — cannot call Platform API."
-  if not platform_url:
-    return "[ERROR] PLATFORM_API_URL not set — cannot call Platform API."
-
-  url = f"{platform_url}/api/v1/sessions/{session_id}/sync"
+  url = f"{session_url}/sync"
   payload: Dict[str, Any] = {}
   if src_path:
     payload["src_path"] = src_path
   if dest_path:
     payload["dest_path"] = dest_path
 
-  logger.info("export_files: POST %s payload=%s", url, json.dumps(payload)[:200])
+  body = orjson.dumps(payload)
+  if logger.isEnabledFor(logging.INFO):
+    logger.info("export_files: POST %s payload=%s", url, body[:200].decode(errors="replace"))
 
   try:
-    async with httpx.AsyncClient(timeout=120.0) as client:
-      resp = await client.post(url, json=payload)
-
-    if resp.status_code >= 400:
-      return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
+    client = _get_client()
+    request = client.build_request(
+      "POST", url, content=body, headers=_JSON_HEADERS, timeout=_TIMEOUTS["export"]
+    )
+    async with _bulkhead("export"):
+      resp = await _platform_breaker(platform_url).call(
+        _retry,
+        functools.partial(client.send, request, stream=True),
+        # 读超时时第一次 sync 可能仍在 Platform 上执行，不重发；只重试连接失败和网关 5xx
+        retry_on=_CONNECT_ERRORS,
+      )
+      try:
+        if resp.status_code >= 400:
+          await resp.aread()
+          return f"[ERROR] Platform API returned {resp.status_code}: {resp.text[:500]}"
+        data = await _read_export_result(resp)
+      finally:
+        await resp.aclose()
 
-    data = resp.json()
     msg = data.get("message", "Files exported successfully")
-    return (
+    result = (
       f"Files exported to host successfully.\n"
       f"  status: {data.get('status', 'ok')}\n"
       f"  message: {msg}\n"
       f"The files are now available in the user's local project directory."
     )
-
-  except httpx.ConnectError:
-    return f"[ERROR] Cannot connect to Platform API at {platform_url}. Is the Go Platform running?"
+    _remember_export(session_url, result)
+    return result
+
+  except CircuitOpenError:
+    return _stale_export(session_url, _CIRCUIT_OPEN_MSG)
+  except (httpx.ConnectError, httpx.ConnectTimeout):
+    return _stale_export(
+      session_url,
+      f"[ERROR] Cannot connect to Platform API at {platform_url}. Is the Go Platform running?",
+    )
   except Exception as exc:
     logger.error("export_files failed: %s", exc)
     return f"[ERROR] export_files failed: {exc}"
@@ -68,6 +68,11 @@ func (h *ChatHandler) StreamEvents(c *gin.Context) {
 		slog.Warn("Failed to disable write deadline for SSE", "error", err)
 	}
 
+	// 订阅已建立，立即下发响应头，客户端据此确认订阅就绪后再发送 /chat，
+	// 否则要等到第一个事件或 30s 心跳才能收到响应头。
+	c.Writer.WriteHeaderNow()
+	c.Writer.Flush()
+
 	c.Stream(func(w io.Writer) bool {
 		select {
 		case event, ok := <-eventCh:
@@ -1,11 +1,20 @@
 import argparse
+import asyncio
 import json
 import os
+import queue
 import sys
 import threading
-import time
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+from typing import Any, Callable
+from urllib.parse import quote, urlsplit
+
+try:
+  import orjson
+  _json_loads = orjson.loads
+  _json_dumps = orjson.dumps
+except ImportError:  # stdlib fallback — the script must run on a bare python3
+  _json_loads = json.loads
+  def _json_dumps(obj): return json.dumps(obj).encode()
 
 # ── Colours ──────────────────────────────────────────────────────────────────
 CYAN = "\033[0;36m"
@@ -16,6 +25,16 @@ DIM = "\033[2m"
 BOLD = "\033[1m"
 NC = "\033[0m"
 
+# Event prefixes, formatted once
+_THOUGHT_PREFIX = f"\n  {DIM}💭 [Thought]{NC} "
+_TOOL_CALL_PREFIX = f"\n  {YELLOW}🔧 [Tool Call]{NC} "
+_ARGS_PREFIX = f"     {DIM}"
+_ARGS_SUFFIX = f"{NC}\n"
+_TOOL_RESULT_PREFIX = f"  {DIM}📋 [Tool Result]{NC} "
+_ANSWER_HEADER = f"\n  {GREEN}{BOLD}✅ [Answer]{NC}\n\n"
+_ERROR_PREFIX = f"\n  {RED}❌ [Error]{NC} "
+_STATUS_PREFIX = f"  {DIM}📡 [Status]{NC} "
+
 
 def info(msg): print(f"{CYAN}[INFO]{NC}  {msg}")
 def ok(msg): print(f"{GREEN}[OK]{NC}    {msg}")
@@ -24,164 +43,361 @@ def fail(msg): print(f"{RED}[FAIL]{NC}  {msg}"); sys.exit(1)
 
 
 # ── HTTP helpers ─────────────────────────────────────────────────────────────
-def api_post(url: str, data: dict | None = None) -> dict:
-  """POST JSON to the API and return the parsed response."""
-  body = json.dumps(data).encode() if data else None
-  req = Request(url, data=body, method="POST")
-  req.add_header("Content-Type", "application/json")
+# A minimal HTTP/1.1 client on asyncio streams, so REST calls and the SSE
+# stream share one event loop without threads or third-party packages.
+async def _connect(parts):
+  tls = parts.scheme == "https"
+  return await asyncio.open_connection(
+    parts.hostname, parts.port or (443 if tls else 80), ssl=tls or None)
+
+
+class _NoResponse(ConnectionError):
+  """The connection failed before the server sent a status line."""
+
+
+async def _exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                    method: str, parts, body: bytes | None = None,
+                    headers: dict | None = None, keep_alive: bool = False):
+  """Send one request on an open connection and return (status, headers)."""
+  target = parts.path or "/"
+  if parts.query:
+    target += "?" + parts.query
+  lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}",
+           "Connection: keep-alive" if keep_alive else "Connection: close"]
+  lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+  if body is not None:
+    lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
   try:
-    with urlopen(req, timeout=120) as resp:
-      return json.loads(resp.read())
-  except HTTPError as e:
-    body = e.read().decode()
-    fail(f"API error {e.code} from {url}: {body}")
-  except URLError as e:
-    fail(f"Cannot reach API at {url}: {e.reason}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+    await writer.drain()
+    status_line = await reader.readline()
+  except ConnectionError as e:
+    raise _NoResponse(f"connection lost before response: {e}") from e
+  if not status_line:
+    raise _NoResponse("connection closed before response")
+
+  while True:
+    status = int(status_line.split()[1])
+    resp_headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+      key, _, value = line.decode("latin-1").partition(":")
+      resp_headers[key.strip().lower()] = value.strip()
+    if not 100 <= status < 200:
+      return status, resp_headers
+    # Interim 1xx response (e.g. 100 Continue): no body, the real one follows
+    status_line = await reader.readline()
+    if not status_line:
+      raise ConnectionError("connection closed after an interim response")
+
+
+def _has_body(method: str, status: int) -> bool:
+  """HEAD responses and 1xx/204/304 never carry a body, whatever the headers say."""
+  return method != "HEAD" and status not in (204, 304) and not 100 <= status < 200
+
+
+async def _send(method: str, url: str, headers: dict | None = None):
+  """Open a dedicated connection, send one request, return (reader, writer, status, headers)."""
+  parts = urlsplit(url)
+  reader, writer = await _connect(parts)
+  try:
+    status, resp_headers = await _exchange(reader, writer, method, parts, headers=headers)
+  except BaseException:
+    writer.close()
+    raise
+  return reader, writer, status, resp_headers
+
+
+async def _iter_body(reader: asyncio.StreamReader, headers: dict,
+                     method: str = "GET", status: int = 200):
+  """Yield the response body in pieces, undoing chunked transfer encoding."""
+  if not _has_body(method, status):
+    return
+  if headers.get("transfer-encoding", "").lower() == "chunked":
+    while size := int((await reader.readline()).split(b";")[0], 16):
+      chunk = await reader.readexactly(size)
+      await reader.readline()  # CRLF after each chunk
+      yield chunk
+    await reader.readline()  # blank line after the last chunk
+  elif "content-length" in headers:
+    yield await reader.readexactly(int(headers["content-length"]))
+  else:
+    while chunk := await reader.read(8192):
+      yield chunk
+
+
+# Idle keep-alive connection per (scheme, host:port), reused by REST calls.
+# The SSE stream always gets its own connection via _send().
+_idle_conns: dict = {}
+
+
+async def _request(method: str, url: str, data: dict | None = None,
+                   timeout: float = 120) -> tuple[int, bytes]:
+  body = _json_dumps(data) if data else None
+  parts = urlsplit(url)
+  key = (parts.scheme, parts.netloc)
+
+  async def run():
+    while True:
+      conn = _idle_conns.pop(key, None)
+      reused = conn is not None
+      reader, writer = conn if reused else await _connect(parts)
+      try:
+        status, headers = await _exchange(reader, writer, method, parts, body, keep_alive=True)
+        payload = b"".join(
+          [chunk async for chunk in _iter_body(reader, headers, method, status)])
+      except _NoResponse:
+        writer.close()
+        if reused:
+          # The server had already dropped the idle connection, so the request
+          # was never handled: reconnect once. Any later failure may come after
+          # the server acted on it (e.g. POST /chat), so it is never retried.
+          continue
+        raise
+      except BaseException:
+        writer.close()
+        raise
+      framed = (not _has_body(method, status)
+                or "content-length" in headers or "transfer-encoding" in headers)
+      if framed and headers.get("connection", "").lower() != "close":
+        _idle_conns[key] = (reader, writer)
+      else:
+        writer.close()
+      return status, payload
+
+  return await asyncio.wait_for(run(), timeout)
+
+
+async def _api_call(method: str, url: str, data: dict | None = None) -> dict:
+  try:
+    status, body = await _request(method, url, data)
+  except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+    fail(f"Cannot reach API at {url}: {e!r}")
+  if status >= 400:
+    fail(f"API error {status} from {url}: {body.decode(errors='replace')}")
+  return _json_loads(body)
 
 
-def api_get(url: str) -> dict:
+async def api_post(url: str, data: dict | None = None) -> dict:
+  """POST JSON to the API and return the parsed response."""
+  return await _api_call("POST", url, data)
+
+
+async def api_get(url: str) -> dict:
   """GET JSON from the API."""
-  req = Request(url)
+  return await _api_call("GET", url)
+
+
+async def api_delete(url: str):
+  """Best-effort DELETE; errors are ignored."""
   try:
-    with urlopen(req, timeout=120) as resp:
-      return json.loads(resp.read())
-  except HTTPError as e:
-    body = e.read().decode()
-    fail(f"API error {e.code} from {url}: {body}")
-  except URLError as e:
-    fail(f"Cannot reach API at {url}: {e.reason}")
+    await _request("DELETE", url, timeout=10)
+  except Exception:
+    pass
+
+
+# ── Console input ────────────────────────────────────────────────────────────
+# Reading stdin blocks, so it runs on one long-lived daemon thread that never
+# holds up interpreter exit. It reads the raw fd rather than calling input():
+# a daemon thread parked inside sys.stdin holds the buffer lock and makes
+# shutdown abort after Ctrl-C.
+_input_requests: queue.SimpleQueue = queue.SimpleQueue()
+_input_thread: threading.Thread | None = None
+
+
+def _settle(fut: asyncio.Future, value, exc):
+  if fut.done():
+    return
+  if exc is not None:
+    fut.set_exception(exc)
+  else:
+    fut.set_result(value)
+
+
+def _input_worker():
+  pending = bytearray()
+  while True:
+    prompt, loop, fut = _input_requests.get()
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    try:
+      while (idx := pending.find(b"\n")) == -1:
+        chunk = os.read(sys.stdin.fileno(), 4096)
+        if not chunk:
+          if not pending:
+            raise EOFError
+          idx = len(pending)
+          break
+        pending += chunk
+      result = (pending[:idx].decode(errors="replace"), None)
+      del pending[:idx + 1]
+    except Exception as e:  # EOFError / OSError
+      result = (None, e)
+    try:
+      loop.call_soon_threadsafe(_settle, fut, *result)
+    except RuntimeError:  # loop already closed
+      return
+
+
+async def ainput(prompt: str) -> str:
+  global _input_thread
+  if _input_thread is None:
+    _input_thread = threading.Thread(target=_input_worker, daemon=True)
+    _input_thread.start()
+  loop = asyncio.get_running_loop()
+  fut = loop.create_future()
+  _input_requests.put((prompt, loop, fut))
+  return await fut
 
 
 # ── SSE stream reader ───────────────────────────────────────────────────────
-def stream_events(api_base: str, session_id: str, stop_event: threading.Event):
+def _preview(value, raw: bytes, limit: int) -> str:
+  """Truncate value for display without repr()-ing a huge dict or list."""
+  if not isinstance(value, str):
+    if len(raw) > limit:
+      # Show a window of the raw JSON instead of rendering the whole object
+      return raw[:limit].decode(errors="ignore") + "…"
+    value = str(value)
+  return value if len(value) <= limit else value[:limit] + "…"
+
+
+def _text(payload) -> str:
+  return payload.get("text", "") if isinstance(payload, dict) else str(payload)
+
+
+def _fmt_thought(payload, raw: bytes) -> str:
+  return f"{_THOUGHT_PREFIX}{_text(payload)}\n"
+
+
+def _fmt_tool_call(payload, raw: bytes) -> str:
+  if isinstance(payload, dict):
+    tool = payload.get("tool_name", payload.get("toolName", ""))
+    args = payload.get("arguments", payload.get("text", ""))
+  else:
+    tool = ""
+    args = payload
+  if not args:
+    return f"{_TOOL_CALL_PREFIX}{tool}\n"
+  # Truncate very long args
+  return f"{_TOOL_CALL_PREFIX}{tool}\n{_ARGS_PREFIX}{_preview(args, raw, 500)}{_ARGS_SUFFIX}"
+
+
+def _fmt_tool_result(payload, raw: bytes) -> str:
+  text = payload.get("text", "") if isinstance(payload, dict) else payload
+  return f"{_TOOL_RESULT_PREFIX}{_preview(text, raw, 300)}\n"
+
+
+def _fmt_answer(payload, raw: bytes) -> str:
+  return f"{_ANSWER_HEADER}  {_text(payload)}\n\n"
+
+
+def _fmt_error(payload, raw: bytes) -> str:
+  text = payload.get("text", str(payload)) if isinstance(payload, dict) else str(payload)
+  return f"{_ERROR_PREFIX}{text}\n"
+
+
+def _fmt_status(payload, raw: bytes) -> str:
+  return f"{_STATUS_PREFIX}{_text(payload)}\n"
+
+
+# event type -> formatter(payload, raw_json); pings and unknown events have no entry
+_HANDLERS: dict[str, Callable[[Any, bytes], str]] = {
+  "agent.thought": _fmt_thought,
+  "agent.tool_call": _fmt_tool_call,
+  "agent.tool_result": _fmt_tool_result,
+  "agent.answer": _fmt_answer,
+  "agent.error": _fmt_error,
+  "session.error": _fmt_error,
+  "agent.status": _fmt_status,
+}
+# Events that end the current turn
+_TERMINAL_EVENTS = frozenset({"agent.answer", "agent.error", "session.error"})
+
+
+def handle_sse_event(raw_event: bytes, stop_event: asyncio.Event):
+  """Print one raw SSE event block; set stop_event on answer / error."""
+  # All lines of the block go out in a single write + flush
+  out: list[str] = []
+  for line in raw_event.strip().split(b"\n"):
+    if not line.startswith(b"data:"):
+      continue
+    payload_raw = line[len(b"data:"):].strip()
+    if not payload_raw:
+      continue
+    try:
+      # Both orjson and json accept bytes, so the payload is never decoded twice
+      event = _json_loads(payload_raw)
+    except ValueError:
+      continue
+
+    evt_type = event.get("type", "")
+    handler = _HANDLERS.get(evt_type)
+    if handler is None:
+      continue
+    out.append(handler(event.get("payload", ""), payload_raw))
+    if evt_type in _TERMINAL_EVENTS:
+      stop_event.set()
+
+  if out:
+    sys.stdout.write("".join(out))
+    sys.stdout.flush()
+
+
+async def stream_events(api_base: str, session_id: str, stop_event: asyncio.Event,
+                        ready_event: asyncio.Event):
   """
   Connect to the SSE stream and print events until the agent finishes
-  (agent.answer received) or the stop_event is set.
+  (agent.answer received) or the stop_event is set. ready_event is set as
+  soon as the response headers arrive, i.e. once the subscription is live.
   """
   url = f"{api_base}/api/v1/sessions/{session_id}/stream"
-  req = Request(url)
-  req.add_header("Accept", "text/event-stream")
-  answer_received = False
+  writer = None
 
   try:
-    with urlopen(req, timeout=300) as resp:
-      buffer = ""
+    reader, writer, status, headers = await _send(
+      "GET", url, headers={"Accept": "text/event-stream"})
+    if status >= 400:
+      raise ConnectionError(f"HTTP {status}")
+    ready_event.set()
+
+    buf = bytearray()
+    scanned = 0  # bytes of buf already known not to contain b"\n\n"
+    async for chunk in _iter_body(reader, headers, "GET", status):
+      buf += chunk
+
+      # SSE events are separated by double newlines. Only complete events
+      # are parsed, so a multi-byte character split across reads is safe.
       while not stop_event.is_set():
-        chunk = resp.read(1)
-        if not chunk:
+        idx = buf.find(b"\n\n", scanned)
+        if idx == -1:
+          scanned = max(0, len(buf) - 1)
           break
-        buffer += chunk.decode("utf-8", errors="replace")
-
-        # SSE events are separated by double newlines
-        while "\n\n" in buffer:
-          raw_event, buffer = buffer.split("\n\n", 1)
-          for line in raw_event.strip().split("\n"):
-            if line.startswith("data:"):
-              payload_str = line[len("data:"):].strip()
-              if not payload_str:
-                continue
-              try:
-                event = json.loads(payload_str)
-              except json.JSONDecodeError:
-                continue
-
-              evt_type = event.get("type", "")
-              payload = event.get("payload", "")
-
-              if evt_type == "agent.thought":
-                text = payload.get("text", "") if isinstance(payload, dict) else str(payload)
-                print(f"\n  {DIM}💭 [Thought]{NC} {text}")
-              elif evt_type == "agent.tool_call":
-                if isinstance(payload, dict):
-                  tool = payload.get("tool_name", payload.get("toolName", ""))
-                  args = payload.get("arguments", payload.get("text", ""))
-                else:
-                  tool = ""
-                  args = str(payload)
-                print(f"\n  {YELLOW}🔧 [Tool Call]{NC} {tool}")
-                if args:
-                  # Truncate very long args
-                  args_str = str(args)
-                  if len(args_str) > 500:
-                    args_str = args_str[:500] + "…"
-                  print(f"     {DIM}{args_str}{NC}")
-              elif evt_type == "agent.tool_result":
-                text = payload.get("text", "") if isinstance(payload, dict) else str(payload)
-                if len(text) > 300:
-                  text = text[:300] + "…"
-                print(f"  {DIM}📋 [Tool Result]{NC} {text}")
-              elif evt_type == "agent.answer":
-                text = payload.get("text", "") if isinstance(payload, dict) else str(payload)
-                print(f"\n  {GREEN}{BOLD}✅ [Answer]{NC}\n")
-                print(f"  {text}\n")
-                answer_received = True
-                stop_event.set()
-              elif evt_type == "agent.error" or evt_type == "session.error":
-                text = payload.get("text", str(payload)) if isinstance(payload, dict) else str(payload)
-                print(f"\n  {RED}❌ [Error]{NC} {text}")
-                stop_event.set()
-              elif evt_type == "agent.status":
-                text = payload.get("text", "") if isinstance(payload, dict) else str(payload)
-                print(f"  {DIM}📡 [Status]{NC} {text}")
-              # Ignore pings and unknown events
-
-          if answer_received or stop_event.is_set():
-            break
+        raw_event = bytes(buf[:idx])
+        del buf[:idx + 2]
+        scanned = 0
+        handle_sse_event(raw_event, stop_event)
+      if stop_event.is_set():
+        break
   except Exception as e:
     if not stop_event.is_set():
       warn(f"SSE stream error: {e}")
+  finally:
+    # Never leave main() waiting on a subscription that failed to open
+    ready_event.set()
+    if writer is not None:
+      writer.close()
 
 
 # ── Main ─────────────────────────────────────────────────────────────────────
-def main():
-  parser = argparse.ArgumentParser(description="Agent Platform – Interactive Client")
-  parser.add_argument("--api", default="http://localhost:8080", help="Platform API base URL")
-  parser.add_argument("--api-key", default=os.environ.get("DEEPSEEK_API_KEY", ""), help="DeepSeek API key")
-  parser.add_argument("--strategy", default="Cold-Strategy", choices=["Cold-Strategy", "Warm-Strategy"],
-                      help="Container strategy")
-  parser.add_argument("--project", default="interactive", help="Project ID")
-  parser.add_argument("--system-prompt", default="", help="Custom system prompt for the agent")
-  args = parser.parse_args()
-
-  if not args.api_key:
-    fail("DEEPSEEK_API_KEY is not set. Pass --api-key or export DEEPSEEK_API_KEY.")
-
-  api_base = args.api.rstrip("/")
-
-  # ── 1. Health check ──────────────────────────────────────────────────────
-  info("Checking platform health …")
-  health = api_get(f"{api_base}/health")
-  if health.get("status") != "ok":
-    fail(f"Platform is not healthy: {health}")
-  ok("Platform is healthy.")
-
-  # ── 2. Create session ────────────────────────────────────────────────────
-  info(f"Creating session (strategy={args.strategy}, project={args.project}) …")
-  env_vars = [
-    f"DEEPSEEK_API_KEY={args.api_key}",
-    f"DEEPSEEK_BASE_URL=https://api.deepseek.com",
-    f"MODEL_NAME=deepseek-chat",
-    f"MAX_LOOPS=20",
-  ]
-
-  session = api_post(f"{api_base}/api/v1/sessions", {
-    "project_id": args.project,
-    "user_id": "interactive-user",
-    "strategy": args.strategy,
-    "image": "agent-runtime:latest",
-    "env_vars": env_vars,
-  })
-  session_id = session["id"]
-  info(f"Session created: {session_id}   (status: {session['status']})")
-
+async def run_session(args, api_base: str, session_id: str, session_url: str):
+  """Wait for the session, configure the agent and run the interactive loop."""
   # ── 3. Wait for session to be ready ──────────────────────────────────────
   info("Waiting for session to be ready (container starting …) …")
   try:
-    ready_resp = api_get(f"{api_base}/api/v1/sessions/{session_id}/wait")
+    ready_resp = await api_get(f"{session_url}/wait")
     ok(f"Session is ready — container {ready_resp.get('container_id', '?')[:12]}")
   except SystemExit:
     # api_get calls fail() which does sys.exit; re-check status for detail
-    s = api_get(f"{api_base}/api/v1/sessions/{session_id}")
+    s = await api_get(session_url)
     fail(f"Session failed to start. Status: {s.get('status')}. "
          f"Check platform.log for details.")
 
@@ -197,10 +413,15 @@ def main():
   if args.system_prompt:
     configure_body["system_prompt"] = args.system_prompt
 
-  configure_resp = api_post(f"{api_base}/api/v1/sessions/{session_id}/configure", configure_body)
+  configure_resp = await api_post(f"{session_url}/configure", configure_body)
   ok(f"Agent configured — tools: {configure_resp.get('available_tools', [])}")
 
   # ── 5. Interactive loop ──────────────────────────────────────────────────
+  # The Platform flushes the SSE headers as soon as the subscription is live.
+  # Servers that don't only answer with the first event, so after one miss
+  # stop waiting for the signal and fall back to a short fixed delay.
+  ready_timeout = 1.0
+
   print()
   print(f"{GREEN}{'═' * 64}{NC}")
   print(f"{GREEN}  Agent is ready! Type your task / prompt below.{NC}")
@@ -212,88 +433,135 @@ def main():
   print(f"{GREEN}{'═' * 64}{NC}")
   print()
 
-  try:
-    while True:
-      try:
-        user_input = input(f"{BOLD}You > {NC}").strip()
-      except EOFError:
-        break
-
-      if not user_input:
-        continue
+  while True:
+    try:
+      user_input = (await ainput(f"{BOLD}You > {NC}")).strip()
+    except EOFError:
+      print()
+      info("Input closed — terminating session …")
+      return
+
+    if not user_input:
+      continue
+
+    # ── Slash commands ────────────────────────────────────────────
+    if user_input.lower() in ("/quit", "/exit", "/q"):
+      info("Terminating session …")
+      return
+
+    if user_input.lower() == "/files":
+      resp = await api_get(f"{session_url}/files")
+      print(f"\n{DIM}{resp.get('output', '(empty)')}{NC}\n")
+      continue
+
+    if user_input.lower().startswith("/read "):
+      path = user_input[6:].strip()
+      resp = await api_get(f"{session_url}/files/read?path={quote(path, safe='/')}")
+      print(f"\n{DIM}── {path} ──{NC}")
+      print(resp.get("content", "(empty)"))
+      print(f"{DIM}{'─' * 40}{NC}\n")
+      continue
+
+    if user_input.lower() == "/sync":
+      resp = await api_post(f"{session_url}/sync", {})
+      ok(resp.get("message", "synced"))
+      continue
+
+    if user_input.lower() == "/status":
+      s = await api_get(session_url)
+      print(json.dumps(s, indent=2))
+      continue
+
+    # ── Send message to agent ─────────────────────────────────────
+    info("Sending message to agent …")
+    stop_event = asyncio.Event()
+    ready_event = asyncio.Event()
+    stream_task = asyncio.create_task(
+      stream_events(api_base, session_id, stop_event, ready_event))
 
-      # ── Slash commands ────────────────────────────────────────────
-      if user_input.lower() in ("/quit", "/exit", "/q"):
-        info("Terminating session …")
-        try:
-          api_post(f"{api_base}/api/v1/sessions/{session_id}", None)
-        except Exception:
-          pass
-        # Use DELETE for termination
+    try:
+      # Send the message only once the SSE subscription is live
+      if ready_timeout:
         try:
-          req = Request(f"{api_base}/api/v1/sessions/{session_id}", method="DELETE")
-          urlopen(req, timeout=10)
-        except Exception:
-          pass
-        ok("Session terminated. Goodbye!")
-        break
-
-      if user_input.lower() == "/files":
-        resp = api_get(f"{api_base}/api/v1/sessions/{session_id}/files")
-        print(f"\n{DIM}{resp.get('output', '(empty)')}{NC}\n")
-        continue
-
-      if user_input.lower().startswith("/read "):
-        path = user_input[6:].strip()
-        resp = api_get(f"{api_base}/api/v1/sessions/{session_id}/files/read?path={path}")
-        print(f"\n{DIM}── {path} ──{NC}")
-        print(resp.get("content", "(empty)"))
-        print(f"{DIM}{'─' * 40}{NC}\n")
-        continue
-
-      if user_input.lower() == "/sync":
-        resp = api_post(f"{api_base}/api/v1/sessions/{session_id}/sync", {})
-        ok(resp.get("message", "synced"))
-        continue
-
-      if user_input.lower() == "/status":
-        s = api_get(f"{api_base}/api/v1/sessions/{session_id}")
-        print(json.dumps(s, indent=2))
-        continue
-
-      # ── Send message to agent ─────────────────────────────────────
-      info("Sending message to agent …")
-      stop_event = threading.Event()
-      stream_thread = threading.Thread(
-        target=stream_events,
-        args=(api_base, session_id, stop_event),
-        daemon=True,
-      )
-      stream_thread.start()
-
-      # Small delay so SSE subscription is ready before we send the message
-      time.sleep(0.3)
-
-      api_post(f"{api_base}/api/v1/sessions/{session_id}/chat", {
+          await asyncio.wait_for(ready_event.wait(), timeout=ready_timeout)
+        except asyncio.TimeoutError:
+          warn("Server does not confirm SSE subscriptions — no longer waiting for it.")
+          ready_timeout = None
+      else:
+        await asyncio.sleep(0.3)
+
+      await api_post(f"{session_url}/chat", {
         "message": user_input,
       })
 
       # Wait for the agent to finish (stream_events sets stop_event)
-      stream_thread.join(timeout=300)
-      if stream_thread.is_alive():
+      done, _ = await asyncio.wait({stream_task}, timeout=300)
+      if not done:
         warn("Agent timed out (5 min). You can /quit or send another message.")
         stop_event.set()
+    finally:
+      # Timed out, interrupted or failed mid-turn: close the SSE socket now
+      if not stream_task.done():
+        stream_task.cancel()
 
-  except KeyboardInterrupt:
+
+async def main():
+  parser = argparse.ArgumentParser(description="Agent Platform – Interactive Client")
+  parser.add_argument("--api", default="http://localhost:8080", help="Platform API base URL")
+  parser.add_argument("--api-key", default=os.environ.get("DEEPSEEK_API_KEY", ""), help="DeepSeek API key")
+  parser.add_argument("--strategy", default="Cold-Strategy", choices=["Cold-Strategy", "Warm-Strategy"],
+                      help="Container strategy")
+  parser.add_argument("--project", default="interactive", help="Project ID")
+  parser.add_argument("--system-prompt", default="", help="Custom system prompt for the agent")
+  args = parser.parse_args()
+
+  if not args.api_key:
+    fail("DEEPSEEK_API_KEY is not set. Pass --api-key or export DEEPSEEK_API_KEY.")
+
+  api_base = args.api.rstrip("/")
+
+  # ── 1. Health check ──────────────────────────────────────────────────────
+  info("Checking platform health …")
+  health = await api_get(f"{api_base}/health")
+  if health.get("status") != "ok":
+    fail(f"Platform is not healthy: {health}")
+  ok("Platform is healthy.")
+
+  # ── 2. Create session ────────────────────────────────────────────────────
+  info(f"Creating session (strategy={args.strategy}, project={args.project}) …")
+  env_vars = [
+    f"DEEPSEEK_API_KEY={args.api_key}",
+    f"DEEPSEEK_BASE_URL=https://api.deepseek.com",
+    f"MODEL_NAME=deepseek-chat",
+    f"MAX_LOOPS=20",
+  ]
+
+  session = await api_post(f"{api_base}/api/v1/sessions", {
+    "project_id": args.project,
+    "user_id": "interactive-user",
+    "strategy": args.strategy,
+    "image": "agent-runtime:latest",
+    "env_vars": env_vars,
+  })
+  session_id = session["id"]
+  session_url = f"{api_base}/api/v1/sessions/{session_id}"
+  info(f"Session created: {session_id}   (status: {session['status']})")
+
+  try:
+    await run_session(args, api_base, session_id, session_url)
+  except (KeyboardInterrupt, asyncio.CancelledError):
+    # asyncio.run() turns Ctrl-C into cancellation of this task
     print()
     info("Interrupted — terminating session …")
-    try:
-      req = Request(f"{api_base}/api/v1/sessions/{session_id}", method="DELETE")
-      urlopen(req, timeout=10)
-    except Exception:
-      pass
+  finally:
+    # Runs on /quit, end of input, Ctrl-C and fail() alike, so the session's
+    # container is never left behind
+    await api_delete(session_url)
     ok("Session terminated. Goodbye!")
 
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  try:
+    asyncio.run(main())
+  except KeyboardInterrupt:
+    pass
\ No newline at end of file